@@ -6,7 +6,14 @@ including parameter models, dependency functions, and documentation helpers.
 """
 
 from typing import Optional, Dict, Any, List, Type
+from bson import ObjectId
+from bson.json_util import dumps as bson_dumps, RELAXED_JSON_OPTIONS
+try:
+    import orjson
+except ImportError:  # optional; responses fall back to bson.json_util
+    orjson = None
 from fastapi import Query, Path, Depends
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field, create_model
 
 # Constants
@@ -14,15 +21,9 @@ MAX_RESULTS_PER_PAGE = 100
 
 # Common parameter models
 class PaginationParams:
-    """Common pagination parameters"""
+    """Common pagination parameters (pages are chained with cursors, see the list endpoints)"""
     def __init__(
         self,
-        page: int = Query(
-            1,
-            description="Page number for pagination",
-            gt=0,
-            example=1
-        ),
         per_page: int = Query(
             25,
             description="Number of results per page",
@@ -31,7 +32,6 @@ class PaginationParams:
             example=25
         ),
     ):
-        self.page = page
         self.per_page = per_page
 
 
@@ -59,7 +59,7 @@ class WorksFilterParams:
         self,
         title: Optional[str] = Query(
             None,
-            description="Filter works by title (case-insensitive partial match)",
+            description="Filter works by title (case-insensitive prefix match, see `contains`; several words use the text index)",
             example="machine learning"
         ),
         year: Optional[int] = Query(
@@ -86,7 +86,7 @@ class AuthorsFilterParams:
         self,
         name: Optional[str] = Query(
             None,
-            description="Filter authors by name (case-insensitive partial match)",
+            description="Filter authors by name (case-insensitive prefix match, see `contains`; several words use the text index)",
             example="John Smith"
         )
     ):
@@ -99,7 +99,7 @@ class ConceptsFilterParams:
         self,
         name: Optional[str] = Query(
             None,
-            description="Filter concepts by name (case-insensitive partial match)",
+            description="Filter concepts by name (case-insensitive prefix match, see `contains`; several words use the text index)",
             example="machine learning"
         ),
         level: Optional[int] = Query(
@@ -119,7 +119,7 @@ class InstitutionsFilterParams:
         self,
         name: Optional[str] = Query(
             None,
-            description="Filter institutions by name (case-insensitive partial match)",
+            description="Filter institutions by name (case-insensitive prefix match, see `contains`; several words use the text index)",
             example="Harvard"
         ),
         country: Optional[str] = Query(
@@ -138,7 +138,7 @@ class PublishersFilterParams:
         self,
         name: Optional[str] = Query(
             None,
-            description="Filter publishers by name (case-insensitive partial match)",
+            description="Filter publishers by name (case-insensitive prefix match, see `contains`; several words use the text index)",
             example="Elsevier"
         )
     ):
@@ -151,7 +151,7 @@ class SourcesFilterParams:
         self,
         name: Optional[str] = Query(
             None,
-            description="Filter sources by name (case-insensitive partial match)",
+            description="Filter sources by name (case-insensitive prefix match, see `contains`; several words use the text index)",
             example="Nature"
         ),
         type: Optional[str] = Query(
@@ -170,7 +170,7 @@ class TopicsFilterParams:
         self,
         name: Optional[str] = Query(
             None,
-            description="Filter topics by name (case-insensitive partial match)",
+            description="Filter topics by name (case-insensitive prefix match, see `contains`; several words use the text index)",
             example="artificial intelligence"
         )
     ):
@@ -183,7 +183,7 @@ class FieldsFilterParams:
         self,
         name: Optional[str] = Query(
             None,
-            description="Filter fields by name (case-insensitive partial match)",
+            description="Filter fields by name (case-insensitive prefix match, see `contains`; several words use the text index)",
             example="Computer Science"
         )
     ):
@@ -196,7 +196,7 @@ class SubfieldsFilterParams:
         self,
         name: Optional[str] = Query(
             None,
-            description="Filter subfields by name (case-insensitive partial match)",
+            description="Filter subfields by name (case-insensitive prefix match, see `contains`; several words use the text index)",
             example="Machine Learning"
         ),
         field: Optional[str] = Query(
@@ -215,7 +215,7 @@ class DomainsFilterParams:
         self,
         name: Optional[str] = Query(
             None,
-            description="Filter domains by name (case-insensitive partial match)",
+            description="Filter domains by name (case-insensitive prefix match, see `contains`; several words use the text index)",
             example="Natural Sciences"
         )
     ):
@@ -243,6 +243,11 @@ def entity_list_description(entity_name: str) -> str:
 #### Field Selection
 - Select specific fields: `select=id,title,publication_year,cited_by_count`
 - Select fields in nested objects: `select=id,authorships.author.display_name`
+
+#### Pagination
+- Follow `meta.next_cursor` (also sent as a `Link: rel="next"` header): `cursor=WzEwMjQsICJBMTIzNDUiXQ==`
+- Omit `cursor` for the first page; there are no page numbers, so deep pages cost the same as the first
+- Totals are only computed on request: `include_count=true`
 """
 
     work_filter_examples = """
@@ -333,9 +338,10 @@ def entity_search_description(entity_name: str) -> str:
 class PaginatedResponse(BaseModel):
     meta: Dict[str, Any] = Field(..., example={
         "count": 25,
-        "total_count": 1358,
-        "page": 1,
         "per_page": 25,
+        "has_more": True,
+        "next_cursor": "WzEwMjQsICJBMTIzNDUiXQ==",
+        "total_count": 1358,
         "total_pages": 55
     })
     results: List[Dict[str, Any]]
@@ -347,3 +353,51 @@ class SearchResponse(BaseModel):
     limit: int = Field(..., example=10)
     results: List[Dict[str, Any]]
     message: Optional[str] = None
+
+
+# JSON rendering (PyMongo returns naive datetimes in UTC, so they are marked as such)
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC if orjson else None
+
+def mongo_json_default(obj: Any) -> Any:
+    """Serialize MongoDB types that orjson doesn't support natively (datetime is native)"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def encode_json(content: Any) -> bytes:
+    """
+    Encode MongoDB documents as JSON with orjson, or with bson.json_util (relaxed
+    Extended JSON, e.g. {"$date": ...} for datetimes) if orjson is not installed
+    """
+    if orjson:
+        return orjson.dumps(content, default=mongo_json_default, option=ORJSON_OPTIONS)
+    return bson_dumps(content, json_options=RELAXED_JSON_OPTIONS).encode()
+
+
+class MongoJSONResponse(JSONResponse):
+    """JSON response rendered in a single C-level pass over MongoDB documents"""
+    def render(self, content: Any) -> bytes:
+        return encode_json(content)
+
+
+# Pages with at most this many documents are rendered in one pass rather than streamed
+STREAM_MIN_RESULTS = 25
+
+def stream_page_response(page: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> StreamingResponse:
+    """
+    Stream a {"meta": ..., "results": [...]} page, encoding one document at a time,
+    so large pages are sent without first rendering the whole body in memory
+    (and therefore can't be cached as a rendered body).
+    """
+    async def chunks():
+        for chunk in encode():
+            yield chunk
+
+    def encode():
+        yield b'{"meta":' + encode_json(page["meta"]) + b',"results":['
+        for i, doc in enumerate(page["results"]):
+            yield (b"," if i else b"") + encode_json(doc)
+        yield b"]}"
+
+    return StreamingResponse(chunks(), media_type="application/json", headers=headers)
@@ -0,0 +1,108 @@
+"""
+Response caching utilities for the OpenAlex Local API
+
+This module provides a small in-process LRU cache with a time-to-live,
+used to short-circuit repeated read requests (API info, entity lookups, searches).
+Responses served from or stored into a cache carry an X-Cache: HIT/MISS header.
+Entries are invalidated by wall-clock expiry only; there are no write endpoints
+that would require explicit invalidation.
+"""
+
+import json
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Dict, Optional
+
+# Default cache settings
+DEFAULT_CACHE_SIZE = 2048
+DEFAULT_CACHE_TTL = 60  # seconds
+COUNT_CACHE_TTL = 30  # seconds
+ENTITY_CACHE_SIZE = 50_000  # per entity type
+ENTITY_CACHE_TTL = 3600  # seconds
+ROOT_CACHE_TTL = 600  # seconds
+QUERY_CACHE_SIZE = 10_000
+QUERY_CACHE_TTL = 300  # seconds
+
+CACHE_HEADER = "X-Cache"
+
+
+class TTLCache:
+    """LRU cache whose entries expire after a fixed number of seconds"""
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE, ttl: float = DEFAULT_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None if it is missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value, evicting the least recently used entry if the cache is full"""
+        self._entries[key] = (monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all entries and reset the statistics"""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit-rate information for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+def make_cache_key(endpoint: str, **params) -> str:
+    """Build a stable cache key from an endpoint name and its normalized query parameters"""
+    return json.dumps([endpoint, sorted(params.items())], default=str, sort_keys=True)
+
+
+def get_entity_cache(entity_type: str) -> TTLCache:
+    """Return the cache for lookups by ID of one entity type, creating it on first use"""
+    cache = entity_caches.get(entity_type)
+    if cache is None:
+        cache = entity_caches[entity_type] = TTLCache(maxsize=ENTITY_CACHE_SIZE, ttl=ENTITY_CACHE_TTL)
+    return cache
+
+
+# Shared cache for hot read endpoints
+response_cache = TTLCache()
+
+# Entities by ID change far less often than search results, so they get their own longer-lived caches
+entity_caches: Dict[str, TTLCache] = {}
+
+# Rendered list pages, keyed by path and query string
+query_cache = TTLCache(maxsize=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL)
+
+# API info and entity counts for the root endpoint
+root_cache = TTLCache(maxsize=1, ttl=ROOT_CACHE_TTL)
+
+# Cache for exact counts of filtered queries, keyed by collection and query
+count_cache = TTLCache(ttl=COUNT_CACHE_TTL)
@@ -0,0 +1,92 @@
+"""
+Query indexes for the OpenAlex Local API
+
+This module lists the compound indexes that the API's query patterns rely on
+and creates the missing ones when the server starts. Index keys follow the
+ESR rule (equality fields first, then the sort keys, then range fields), so
+that filtered and sorted list queries are answered in index order without an
+in-memory sort. The _id suffix matches the tie-breaker used for cursor pagination.
+
+Once the full set exists, a metadata entry records its version, so later
+startups skip the catalog checks; bump INDEXES_VERSION when the set changes.
+
+The bulk indexes for a fresh import (text indexes, single-field lookups) are
+still created by update_openalex_index.py.
+"""
+
+import logging
+from time import perf_counter
+from typing import List, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.errors import PyMongoError
+
+from filter_utils import RELATED_WORKS_FIELDS, DEFAULT_SORT_FIELDS, GROUP_BY_INDEXED_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Metadata entry marking the index set below as created
+INDEXES_METADATA_KEY = "query_indexes"
+INDEXES_VERSION = 4
+
+# (collection, index keys) pairs required by the list endpoints
+REQUIRED_INDEXES: List[Tuple[str, List[Tuple[str, int]]]] = [
+    # works filtered by type and/or year, sorted by citations
+    ("works", [("type", ASCENDING), ("publication_year", ASCENDING), ("cited_by_count", DESCENDING), ("_id", ASCENDING)]),
+    ("works", [("publication_year", ASCENDING), ("cited_by_count", DESCENDING), ("_id", ASCENDING)]),
+    # concepts filtered by level, sorted by works count
+    ("concepts", [("level", ASCENDING), ("works_count", DESCENDING), ("_id", ASCENDING)]),
+] + [
+    # top works of an entity (include=works on lookups), read in index order
+    ("works", [(field, ASCENDING), ("cited_by_count", DESCENDING)])
+    for field in RELATED_WORKS_FIELDS.values()
+] + [
+    # default sort of each list endpoint, plus sorting by citations
+    (collection_name, [(field, DESCENDING), ("_id", ASCENDING)])
+    for collection_name, default_field in DEFAULT_SORT_FIELDS.items()
+    for field in dict.fromkeys([default_field, "cited_by_count"])
+] + [
+    # unfiltered group_by walks (and is hinted to) the group field's index
+    (collection_name, [(field, ASCENDING)])
+    for collection_name, fields in GROUP_BY_INDEXED_FIELDS.items()
+    for field in fields
+]
+
+
+async def ensure_indexes(db: AsyncDatabase) -> None:
+    """Create the required indexes that don't exist yet; existing ones are left untouched"""
+    if await db.metadata.find_one({"key": INDEXES_METADATA_KEY, "value": INDEXES_VERSION}):
+        return
+
+    complete = True
+    existing = {}
+    for collection_name, keys in REQUIRED_INDEXES:
+        if collection_name not in existing:
+            try:
+                info = await db[collection_name].index_information()
+            except PyMongoError as e:
+                logger.warning(f"Could not list indexes of {collection_name}: {e}")
+                info = {}
+                complete = False
+            existing[collection_name] = [[tuple(key) for key in index["key"]] for index in info.values()]
+
+        if [tuple(key) for key in keys] in existing[collection_name]:
+            continue
+
+        try:
+            logger.info(f"Creating index {keys} on {collection_name}")
+            start_time = perf_counter()
+            await db[collection_name].create_index(keys)
+            logger.info(f"Index {keys} on {collection_name} created in {perf_counter() - start_time:.1f}s")
+            existing[collection_name].append([tuple(key) for key in keys])
+        except PyMongoError as e:
+            logger.warning(f"Error creating index {keys} on {collection_name}: {e}")
+            complete = False
+
+    if complete:
+        await db.metadata.update_one(
+            {"key": INDEXES_METADATA_KEY},
+            {"$set": {"value": INDEXES_VERSION}},
+            upsert=True
+        )
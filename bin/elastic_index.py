@@ -118,8 +118,9 @@ class ESIndex:
             logger.error(f"Error in bulk indexing: {e}")
             raise
 
-    async def search(self, index: str, query: str, skip: int = 0, limit: int = 10, filter_query: dict | None = None):
-        """Search documents in Elasticsearch"""
+    async def search(self, index: str, query: str, skip: int = 0, limit: int = 10, filter_query: dict | None = None,
+                     source: bool = True):
+        """Search documents in Elasticsearch (source=False returns only ids and scores)"""
         index_name = f"{self.index_prefix}_{index}"
         
         print("Elasticsearch input:", {
@@ -174,6 +175,8 @@ class ESIndex:
                 {"_score": {"order": "desc"}}
             ]
         }
+        if not source:
+            search_body["_source"] = False
         
         print("Elasticsearch query body:", search_body)
 
@@ -205,7 +208,7 @@ class ESIndex:
                     {
                         "id": hit["_id"],
                         "score": hit["_score"],
-                        **hit["_source"]
+                        **hit.get("_source", {})
                     } for hit in hits["hits"]
                 ]
             }
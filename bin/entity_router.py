@@ -5,19 +5,21 @@ This module provides a factory function to create FastAPI routers for different
 with standardized CRUD operations.
 """
 
+import asyncio
 import logging
 from typing import Dict, Any, Callable, Optional, Type, List
-from fastapi import APIRouter, Depends, Query, Path, HTTPException
-from bson.objectid import ObjectId
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from fastapi import APIRouter, Depends, Query, Path, HTTPException, Request, Response
 from pymongo import DESCENDING
+from pymongo.asynchronous.database import AsyncDatabase
 from time import perf_counter
 
 from handlers import BaseEntityHandler
-from filter_utils import parse_filter_param
+from cache_utils import response_cache, query_cache, get_entity_cache, make_cache_key, CACHE_HEADER
+from filter_utils import parse_filter_param, build_name_filter, normalize_entity_id, RELATED_WORKS_FIELDS
 from api_utils import (
     PaginationParams, SearchParams, entity_list_description, entity_get_description,
-    entity_search_description, PaginatedResponse, SearchResponse
+    entity_search_description, PaginatedResponse, SearchResponse, MongoJSONResponse, stream_page_response,
+    STREAM_MIN_RESULTS
 )
 
 
@@ -29,7 +31,7 @@ class EntityRouter:
     def __init__(
         self, 
         router: APIRouter, 
-        db: AsyncIOMotorDatabase, 
+        db: AsyncDatabase, 
         handlers: Dict[str, BaseEntityHandler],
         entity_type: str,
         entity_name_singular: str,
@@ -37,7 +39,7 @@ class EntityRouter:
         filter_params_class: Optional[Type] = None,
         sort_field: str = "works_count",
         related_entities: List[str] = None,
-        jsonable_encoder: Callable = None,
+        stream_results: bool = False,
     ):
         self.router = router
         self.db = db
@@ -48,7 +50,8 @@ class EntityRouter:
         self.filter_params_class = filter_params_class
         self.sort_field = sort_field
         self.related_entities = related_entities or []
-        self.jsonable_encoder = jsonable_encoder
+        self.stream_results = stream_results
+        self.entity_cache = get_entity_cache(entity_type)
         
         # Get logger for this entity type
         self.logger = logging.getLogger(f"entity_router.{entity_type}")
@@ -64,6 +67,8 @@ class EntityRouter:
 
     def _register_routes(self):
         """Register the standard routes for this entity type"""
+        # Resolve the handler once; the endpoints below capture it instead of looking it up per request
+        handler = self.handlers[self.entity_type]
         
         # 1. List/filter endpoint
         @self.router.get(
@@ -73,25 +78,37 @@ class EntityRouter:
             response_model=PaginatedResponse
         )
         async def list_entities(
+            request: Request,
             pagination: PaginationParams = Depends(),
+            cursor: Optional[str] = Query(None, description="Cursor from meta.next_cursor of the previous page; omit for the first page"),
+            include_count: bool = Query(False, description="Include total_count and total_pages (counts all matches, slower; null if the count times out)"),
             filter: Optional[str] = Query(None, description="OpenAlex-style filter parameter. Examples: 'publication_year:2020', 'cited_by_count:>100'"),
             sort: Optional[str] = Query(None, description="Sort parameter. Examples: 'cited_by_count:desc', 'publication_year:asc'"),
             select: Optional[str] = Query(None, description="Fields to return. Examples: 'id,title,publication_year'"),
+            contains: bool = Query(False, description="Match name/title anywhere instead of as a prefix (slower, cannot use an index)"),
             filters: Any = Depends(self.filter_params_class) if self.filter_params_class else None
         ):
             """List and filter entities with pagination"""
+            # Serve repeated queries from the rendered pages cache
+            cache_key = make_cache_key(request.url.path, query=sorted(request.query_params.multi_items()))
+            cached = query_cache.get(cache_key)
+            if cached is not None:
+                body, headers = cached
+                return Response(content=body, media_type="application/json", headers={**headers, CACHE_HEADER: "HIT"})
+
             # Process filter parameters into extra_filters dict
             extra_filters = {}
             if filters:
                 for attr, value in vars(filters).items():
                     # Custom handling for specific fields
                     if value is not None:
-                        if attr == 'name':
-                            # Handle name as display_name with regex
-                            extra_filters["display_name"] = {"$regex": value, "$options": "i"}
-                        elif attr == 'title':
-                            # Handle title with regex
-                            extra_filters["title"] = {"$regex": value, "$options": "i"}
+                        if attr in ('name', 'title'):
+                            # Handle name as display_name, and title (text index or prefix regex)
+                            field = "display_name" if attr == 'name' else "title"
+                            try:
+                                extra_filters.update(build_name_filter(field, value, contains))
+                            except ValueError as e:
+                                raise HTTPException(status_code=400, detail=str(e))
                         elif attr == 'country':
                             # Handle country code
                             extra_filters["country_code"] = value.upper()
@@ -111,16 +128,33 @@ class EntityRouter:
                             # Default case
                             extra_filters[attr] = value
 
-            return await self.handlers[self.entity_type].list_entities(
-                page=pagination.page,
+            result = await handler.list_entities(
                 per_page=pagination.per_page,
                 sort_field=self.sort_field,
                 filter_param=filter,
                 sort_param=sort,
                 select_param=select,
-                extra_filters=extra_filters
+                extra_filters=extra_filters,
+                cursor=cursor,
+                include_count=include_count
             )
 
+            # Advertise the next page as a Link header as well
+            headers = {}
+            next_cursor = result["meta"]["next_cursor"]
+            if next_cursor:
+                next_url = request.url.include_query_params(cursor=next_cursor)
+                headers["Link"] = f'<{next_url}>; rel="next"'
+
+            # Serialize directly, skipping FastAPI's response_model validation and encoding;
+            # larger pages of collections with large documents are streamed one document at a
+            # time and not cached, as caching would hold the whole body in memory again
+            if self.stream_results and len(result["results"]) > STREAM_MIN_RESULTS:
+                return stream_page_response(result, headers={**headers, CACHE_HEADER: "MISS"})
+            response = MongoJSONResponse(result, headers={**headers, CACHE_HEADER: "MISS"})
+            query_cache.set(cache_key, (response.body, headers))
+            return response
+
         # 2. Search endpoint (only add if "search" is in related_entities)
         if "search" in self.related_entities:
             self.logger.debug(f"Checking search capability for {self.entity_name_plural}")
@@ -144,11 +178,21 @@ class EntityRouter:
                     self.logger.debug(f"Search params: q='{search_params.q}', skip={search_params.skip}, limit={search_params.limit}")
                     self.logger.debug(f"Additional params: filter='{filter}', sort='{sort}', select='{select}'")
 
+                cache_key = make_cache_key(
+                    f"{self.entity_type}.search", q=search_params.q, skip=search_params.skip,
+                    limit=search_params.limit, explain_score=search_params.explain_score,
+                    filter=filter, sort=sort, select=select
+                )
+                cached = response_cache.get(cache_key)
+                if cached is not None:
+                    # The cache holds the rendered body, so hits skip JSON encoding as well
+                    return Response(content=cached, media_type="application/json", headers={CACHE_HEADER: "HIT"})
+
                 # Process filter if provided
                 filter_query = parse_filter_param(filter) if filter else None
                 
                 try:
-                    result = await self.handlers[self.entity_type].search_entities(
+                    result = await handler.search_entities(
                         q=search_params.q,
                         skip=search_params.skip,
                         limit=search_params.limit,
@@ -165,7 +209,9 @@ class EntityRouter:
                         self.logger.debug(f"Search completed in {total_time:.3f}s")
                         self.logger.debug(f"Found {total_results} matching {self.entity_name_plural}")
                         
-                    return result
+                    response = MongoJSONResponse(result, headers={CACHE_HEADER: "MISS"})
+                    response_cache.set(cache_key, response.body)
+                    return response
                     
                 except Exception as e:
                     self.logger.error(f"Search error: {e}")
@@ -180,87 +226,83 @@ class EntityRouter:
         async def get_entity(
             entity_id: str = Path(..., description=f"The ID of the {self.entity_name_singular} to retrieve"),
             select: Optional[str] = Query(None, description="Fields to return. Examples: 'id,title,publication_year'"),
-            include: Optional[str] = Query(None, description="Related entities to include. Examples: 'works,authors,concepts'")
+            include: Optional[str] = Query(None, description="Related entities to include. Examples: 'works,authors,concepts'"),
+            full: bool = Query(False, description="Return the full document including large fields such as abstract_inverted_index and counts_by_year")
         ):
             """Get a specific entity by ID with related entities"""
             if self.verbose:
                 start_time = perf_counter()
                 self.logger.debug(f"Getting {self.entity_type} with ID: {entity_id}")
 
+            # Key the cache on the short ID so the URL and short forms of an ID share an entry
+            cache_key = make_cache_key(
+                f"{self.entity_type}.get", entity_id=normalize_entity_id(entity_id) or entity_id,
+                select=select, include=include, full=full
+            )
+            cached = self.entity_cache.get(cache_key)
+            if cached is not None:
+                # The cache holds the rendered body, so hits skip JSON encoding as well
+                return Response(content=cached, media_type="application/json", headers={CACHE_HEADER: "HIT"})
+
             # Parse include parameter
             include_entities = set(include.split(",")) if include else set()
             
             # Get base entity
             entity_start = perf_counter() if self.verbose else None
-            entity = await self.handlers[self.entity_type].get_entity(entity_id, select)
+            entity = await handler.get_entity(entity_id, select, full)
             if self.verbose:
                 entity_time = perf_counter() - entity_start
                 self.logger.debug(f"Base entity fetch took: {entity_time:.3f}s")
             
-            # Add related entities only if they are requested and supported
+            # Collect the requested related entities; the lookups are independent and run concurrently
+            related = {}
             if 'works' in self.related_entities and 'works' in include_entities:
-                works_start = perf_counter() if self.verbose else None
-                field_name = f"{self.entity_type[:-1] if self.entity_type.endswith('s') else self.entity_type}_id"
-                
-                # Different entities may require different query fields
-                filter_field = field_name
-                if self.entity_type == 'authors':
-                    filter_field = "author_ids"
-                elif self.entity_type == 'concepts':
-                    filter_field = "concept_ids"
-                elif self.entity_type == 'institutions':
-                    filter_field = "institution_ids"
+                # The sort follows the (filter_field, cited_by_count) index from db_indexes
+                filter_field = RELATED_WORKS_FIELDS[self.entity_type]
                 
                 if self.verbose:
-                    self.logger.debug(f"Fetching related works with filter: {filter_field}={entity_id}")
+                    self.logger.debug(f"Fetching related works with filter: {filter_field}={entity['_id']}")
                 
-                # Get related works
-                entity["works"] = await self.db.works.find(
-                    {filter_field: entity_id},
+                # The _*_id(s) fields hold short IDs, so query with the normalized _id rather
+                # than the path parameter, which may be a URL or lowercase
+                related["works"] = self.db.works.find(
+                    {filter_field: entity["_id"]},
                     {"id": 1, "title": 1, "publication_year": 1, "cited_by_count": 1, "type": 1}
-                ).sort("cited_by_count", DESCENDING).limit(100).to_list(length=None)
-                
-                if self.verbose:
-                    works_time = perf_counter() - works_start
-                    self.logger.debug(f"Related works fetch took: {works_time:.3f}s")
-                    self.logger.debug(f"Found {len(entity['works'])} related works")
+                ).sort("cited_by_count", DESCENDING).limit(100).to_list(length=100)
             
-            # Add other related entities only if requested
-            if 'authors' in self.related_entities and 'authors' in include_entities and entity.get("_author_ids"):
-                authors_start = perf_counter() if self.verbose else None
-                if self.verbose:
-                    self.logger.debug(f"Fetching {len(entity['_author_ids'])} related authors")
-                
-                entity["authors"] = await self.db.authors.find(
-                    {"id": {"$in": entity["_author_ids"]}},
-                    {"_id": 0, "id": 1, "display_name": 1}
-                ).to_list(length=None)
-                
-                if self.verbose:
-                    authors_time = perf_counter() - authors_start
-                    self.logger.debug(f"Related authors fetch took: {authors_time:.3f}s")
+            # Authors and concepts of a work are embedded in the work document (the snapshot
+            # denormalizes their names), so they are read from it without follow-up queries
+            if 'authors' in self.related_entities and 'authors' in include_entities:
+                entity["authors"] = [
+                    {"id": author["id"], "display_name": author.get("display_name")}
+                    for authorship in entity.get("authorships") or []
+                    for author in [authorship.get("author") or {}]
+                    if author.get("id")
+                ]
             
-            if 'concepts' in self.related_entities and 'concepts' in include_entities and entity.get("_concept_ids"):
-                concepts_start = perf_counter() if self.verbose else None
-                if self.verbose:
-                    self.logger.debug(f"Fetching {len(entity['_concept_ids'])} related concepts")
-                
-                entity["concepts"] = await self.db.concepts.find(
-                    {"id": {"$in": entity["_concept_ids"]}},
-                    {"_id": 0, "id": 1, "display_name": 1, "level": 1}
-                ).to_list(length=None)
+            if 'concepts' in self.related_entities and 'concepts' in include_entities:
+                entity["concepts"] = [
+                    {"id": concept["id"], "display_name": concept.get("display_name"), "level": concept.get("level")}
+                    for concept in entity.get("concepts") or []
+                    if concept.get("id")
+                ]
+            
+            if related:
+                related_start = perf_counter() if self.verbose else None
+                entity.update(zip(related, await asyncio.gather(*related.values())))
                 
                 if self.verbose:
-                    concepts_time = perf_counter() - concepts_start
-                    self.logger.debug(f"Related concepts fetch took: {concepts_time:.3f}s")
+                    related_time = perf_counter() - related_start
+                    self.logger.debug(f"Related {', '.join(related)} fetch took: {related_time:.3f}s")
             
-            result = self.jsonable_encoder(entity)
+            response = MongoJSONResponse(entity, headers={CACHE_HEADER: "MISS"})
+            self.entity_cache.set(cache_key, response.body)
             
             if self.verbose:
                 total_time = perf_counter() - start_time
                 self.logger.debug(f"Total request processing time: {total_time:.3f}s")
             
-            return result
+            return response
 
         # 4. Group by endpoint (for analytics)
         @self.router.get(
@@ -276,14 +318,15 @@ class EntityRouter:
             # Process any traditional filters
             extra_filters = {}
             
-            return await self.handlers[self.entity_type].group_entities(
+            result = await handler.group_entities(
                 group_by=field,
                 filter_param=filter,
                 extra_filters=extra_filters
             )
+            return MongoJSONResponse(result)
 
 
-def create_entity_routers(app, db, handlers, jsonable_encoder):
+def create_entity_routers(app, db, handlers):
     """Create and register all entity routers"""
     from api_utils import (
         WorksFilterParams, AuthorsFilterParams, ConceptsFilterParams,
@@ -302,7 +345,7 @@ def create_entity_routers(app, db, handlers, jsonable_encoder):
         filter_params_class=WorksFilterParams,
         sort_field="cited_by_count",
         related_entities=["search", "authors", "concepts"],
-        jsonable_encoder=jsonable_encoder
+        stream_results=True
     )
     
     # Create router for authors
@@ -315,8 +358,7 @@ def create_entity_routers(app, db, handlers, jsonable_encoder):
         entity_name_plural="authors",
         filter_params_class=AuthorsFilterParams,
         sort_field="cited_by_count",
-        related_entities=["search", "works"],
-        jsonable_encoder=jsonable_encoder
+        related_entities=["search", "works"]
     )
     
     # Create router for concepts
@@ -329,8 +371,7 @@ def create_entity_routers(app, db, handlers, jsonable_encoder):
         entity_name_plural="concepts",
         filter_params_class=ConceptsFilterParams,
         sort_field="works_count",
-        related_entities=["search", "works"],
-        jsonable_encoder=jsonable_encoder
+        related_entities=["search", "works"]
     )
     
     # Create router for institutions
@@ -343,8 +384,7 @@ def create_entity_routers(app, db, handlers, jsonable_encoder):
         entity_name_plural="institutions",
         filter_params_class=InstitutionsFilterParams,
         sort_field="works_count",
-        related_entities=["search", "works"],
-        jsonable_encoder=jsonable_encoder
+        related_entities=["search", "works"]
     )
     
     # Create router for publishers
@@ -357,8 +397,7 @@ def create_entity_routers(app, db, handlers, jsonable_encoder):
         entity_name_plural="publishers",
         filter_params_class=PublishersFilterParams,
         sort_field="works_count",
-        related_entities=["works", "search"],
-        jsonable_encoder=jsonable_encoder
+        related_entities=["works", "search"]
     )
     
     # Create router for sources
@@ -371,8 +410,7 @@ def create_entity_routers(app, db, handlers, jsonable_encoder):
         entity_name_plural="sources",
         filter_params_class=SourcesFilterParams,
         sort_field="works_count",
-        related_entities=["search", "works"],
-        jsonable_encoder=jsonable_encoder
+        related_entities=["search", "works"]
     )
     
     # Create router for topics
@@ -385,8 +423,7 @@ def create_entity_routers(app, db, handlers, jsonable_encoder):
         entity_name_plural="topics",
         filter_params_class=TopicsFilterParams,
         sort_field="works_count",
-        related_entities=["search", "works"],
-        jsonable_encoder=jsonable_encoder
+        related_entities=["search", "works"]
     )
     
     # Create router for fields
@@ -399,8 +436,7 @@ def create_entity_routers(app, db, handlers, jsonable_encoder):
         entity_name_plural="fields",
         filter_params_class=FieldsFilterParams,
         sort_field="works_count",
-        related_entities=["search", "works", "subfields"],
-        jsonable_encoder=jsonable_encoder
+        related_entities=["search", "works", "subfields"]
     )
     
     # Create router for subfields
@@ -413,8 +449,7 @@ def create_entity_routers(app, db, handlers, jsonable_encoder):
         entity_name_plural="subfields",
         filter_params_class=SubfieldsFilterParams,
         sort_field="works_count",
-        related_entities=["search", "works", "fields"],
-        jsonable_encoder=jsonable_encoder
+        related_entities=["search", "works", "fields"]
     )
     
     # Create router for domains
@@ -427,6 +462,5 @@ def create_entity_routers(app, db, handlers, jsonable_encoder):
         entity_name_plural="domains",
         filter_params_class=DomainsFilterParams,
         sort_field="works_count",
-        related_entities=["search", "works", "fields"],
-        jsonable_encoder=jsonable_encoder
+        related_entities=["search", "works", "fields"]
     )
@@ -24,8 +24,18 @@ Select syntax:
 
 from typing import Dict, Any, List, Optional, Tuple
 import re
+import json
+import base64
+from functools import lru_cache
 from urllib.parse import unquote
 
+# Aggregation pipelines built in this module keep the order
+#   $match -> $sort -> $limit -> $project
+# A $project placed between $match and $sort stops the planner from pushing
+# the sort (and limit) down into an index scan, turning a bounded top-k read
+# into a blocking in-memory sort. check_pipeline_order() enforces this.
+PIPELINE_FILTER_STAGES = ("$match", "$sort", "$limit")
+
 # Constants for filter operations
 FILTER_OPERATIONS = {
     ":": "eq",  # Equals
@@ -52,6 +62,55 @@ DEFAULT_SORT_FIELDS = {
     "domains": "works_count"
 }
 
+# Fields with a single-field index that group_by may hint, per collection
+# (indexes are created by update_openalex_index.py)
+GROUP_BY_INDEXED_FIELDS = {
+    "works": ["publication_year", "type", "language", "is_retracted", "has_fulltext"]
+}
+
+# Works fields referencing each entity type (set at import time), used to list an entity's works
+RELATED_WORKS_FIELDS = {
+    "authors": "_author_ids",
+    "concepts": "_concept_ids",
+    "institutions": "_institution_ids",
+    "publishers": "_publisher_id",
+    "sources": "_source_id",
+    "topics": "_topic_ids",
+    "fields": "_field_ids",
+    "subfields": "_subfield_ids",
+    "domains": "_domain_ids"
+}
+
+# Default projections for list and search endpoints (used when no select parameter is given)
+DEFAULT_LIST_PROJECTIONS = {
+    "works": {"id": 1, "title": 1, "publication_year": 1, "type": 1, "cited_by_count": 1,
+              "authorships.author.id": 1, "authorships.author.display_name": 1},
+    "authors": {"id": 1, "display_name": 1, "cited_by_count": 1, "works_count": 1},
+    "concepts": {"id": 1, "display_name": 1, "level": 1, "works_count": 1},
+    "institutions": {"id": 1, "display_name": 1, "country_code": 1, "type": 1, "cited_by_count": 1, "works_count": 1},
+    "publishers": {"id": 1, "display_name": 1, "cited_by_count": 1, "works_count": 1},
+    "sources": {"id": 1, "display_name": 1, "type": 1, "cited_by_count": 1, "works_count": 1},
+    "topics": {"id": 1, "display_name": 1, "cited_by_count": 1, "works_count": 1},
+    "fields": {"id": 1, "display_name": 1, "cited_by_count": 1, "works_count": 1},
+    "subfields": {"id": 1, "display_name": 1, "cited_by_count": 1, "works_count": 1},
+    "domains": {"id": 1, "display_name": 1, "cited_by_count": 1, "works_count": 1}
+}
+
+# Large or internal fields left out of single-entity responses unless the full document
+# (or an explicit select) is requested
+LARGE_ENTITY_FIELDS = {
+    "works": ["abstract_inverted_index", "search_blob", "title_lc", "display_name_lc"],
+    "authors": ["x_concepts", "counts_by_year", "display_name_lc"],
+    "concepts": ["related_concepts", "counts_by_year", "display_name_lc"],
+    "institutions": ["x_concepts", "counts_by_year", "associated_institutions", "display_name_lc"],
+    "publishers": ["counts_by_year", "display_name_lc"],
+    "sources": ["x_concepts", "counts_by_year", "display_name_lc"],
+    "topics": ["counts_by_year", "display_name_lc"],
+    "fields": ["counts_by_year", "display_name_lc"],
+    "subfields": ["counts_by_year", "display_name_lc"],
+    "domains": ["counts_by_year", "display_name_lc"]
+}
+
 # Sort directions
 SORT_DIRECTIONS = {
     "asc": 1,  # MongoDB ascending
@@ -113,6 +172,86 @@ def parse_filter_value(field_name: str, value: str) -> Any:
     # Default case - return the value as-is
     return value
 
+# Short OpenAlex IDs as stored in _id: an optional entity letter and digits (W123, A456, 17 for fields)
+ENTITY_ID_PATTERN = re.compile(r"[A-Za-z]?\d+")
+
+def normalize_entity_id(entity_id: str) -> Optional[str]:
+    """
+    Reduce an OpenAlex ID or URL to the short form used as _id, or return None
+    if it cannot be an OpenAlex ID (so the lookup can be skipped).
+    
+    Example: "https://openalex.org/w2741809807" -> "W2741809807"
+    """
+    short_id = entity_id.rstrip("/").split("/")[-1]
+    if not ENTITY_ID_PATTERN.fullmatch(short_id):
+        return None
+    return short_id.upper()
+
+# Shortest name/title filter accepted; shorter prefixes match too large a part of a collection
+MIN_NAME_FILTER_LENGTH = 3
+
+@lru_cache(maxsize=1024)
+def build_name_regex(value: str, contains: bool = False) -> re.Pattern:
+    """
+    Build a regex for name/title filters against the lowercased name fields.
+    
+    The input is lowercased and matched literally. By default it is anchored to
+    the start of the field (prefix match); as the pattern is case-sensitive, MongoDB
+    can bound the scan of the *_lc index to the prefix range. A trailing wildcard
+    ("*" or ".*") is accepted and dropped. Pass contains=True for the slower
+    unanchored substring match.
+    
+    Returns a compiled pattern, which PyMongo sends as a BSON regex. Patterns are
+    cached, so repeated lookups (e.g. autocompletion) reuse the same object.
+    
+    Example: "Neural Net*" -> re.compile("^neural\\ net")
+    """
+    if value.endswith(".*"):
+        value = value[:-2]
+    elif value.endswith("*"):
+        value = value[:-1]
+    pattern = re.escape(value.lower())
+    if not contains:
+        pattern = "^" + pattern
+    return re.compile(pattern)
+
+def build_name_filter(field: str, value: str, contains: bool = False) -> Dict[str, Any]:
+    """
+    Build the query clause for a name/title filter.
+    
+    Bag-of-words input (several unquoted words without a trailing wildcard) is
+    answered by the collection's text index with a $text query that requires
+    every word. Single words, prefixes ("neur*"), quoted phrases and contains
+    matches fall back to the regex from build_name_regex, matched against the
+    lowercased copy of the field (e.g. title_lc, written at import time).
+    
+    A collection has a single text index, which may cover more than the field
+    (on works it covers the search_blob with title, authors and year), so the
+    $text match is narrowed to documents whose field contains every word.
+    
+    Raises ValueError if the term (without quotes or wildcard) is shorter than
+    MIN_NAME_FILTER_LENGTH.
+    
+    Example: "deep learning" -> {"$text": {"$search": "\"deep\" \"learning\""},
+                                 "title_lc": {"$all": [re.compile("deep"), re.compile("learning")]}}
+             "Deep lear*"    -> {"title_lc": re.compile("^deep\\ lear")}
+    """
+    value = value.strip()
+    if len(value.strip('"*. ')) < MIN_NAME_FILTER_LENGTH:
+        raise ValueError(f"{field} filter must have at least {MIN_NAME_FILTER_LENGTH} characters")
+    if len(value) > 1 and value.startswith('"') and value.endswith('"'):
+        return {f"{field}_lc": build_name_regex(value[1:-1], contains)}
+    
+    words = value.split()
+    if len(words) > 1 and not value.endswith("*") and not contains:
+        # Quoting each word makes $text require all of them instead of any
+        return {
+            "$text": {"$search": " ".join(f'"{word}"' for word in words)},
+            f"{field}_lc": {"$all": [build_name_regex(word, True) for word in words]}
+        }
+    
+    return {f"{field}_lc": build_name_regex(value, contains)}
+
 def parse_filter_expression(filter_expr: str) -> Tuple[str, str, Any]:
     """
     Parse a single filter expression into field, operation, and value.
@@ -404,20 +543,89 @@ def parse_group_by_param(group_by_param: Optional[str]) -> Dict:
         {
             "$group": {
                 "_id": f"${group_field}",
-                "count": {"$sum": 1},
-                "key": {"$first": f"${group_field}"}
+                "count": {"$sum": 1}
             }
         },
+        {
+            "$sort": {"count": -1}
+        },
         {
             "$project": {
                 "_id": 0,
-                "key": 1,
+                "key": "$_id",
                 "count": 1
             }
-        },
-        {
-            "$sort": {"count": -1}
         }
     ]
     
     return pipeline
+
+def check_pipeline_order(pipeline: List[Dict]) -> List[Dict]:
+    """
+    Check that no $project stage precedes a $match, $sort or $limit stage.
+    
+    Returns the pipeline unchanged so it can wrap pipeline construction.
+    Raises ValueError if the ordering invariant is violated.
+    """
+    projected = False
+    for stage in pipeline:
+        stage_name = next(iter(stage))
+        if stage_name == "$project":
+            projected = True
+        elif projected and stage_name in PIPELINE_FILTER_STAGES:
+            raise ValueError(f"Pipeline stage {stage_name} must come before $project: {pipeline}")
+    return pipeline
+
+def get_field_value(document: Dict, field: str) -> Any:
+    """Get a (possibly dotted) field value from a document, or None if it is missing"""
+    value = document
+    for part in field.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+def encode_cursor(values: List[Any]) -> str:
+    """
+    Encode the sort key values of the last returned document as an opaque pagination cursor.
+    
+    Example: [1024, "A12345"] -> "WzEwMjQsICJBMTIzNDUiXQ=="
+    """
+    return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode()
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """
+    Decode a cursor created by encode_cursor. Raises ValueError if it is malformed.
+    
+    Only scalar values are accepted: the values end up in the keyset query, where
+    a dict such as {"$ne": null} would be interpreted as a query operator.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise ValueError("malformed cursor")
+    if not isinstance(values, list):
+        raise ValueError("malformed cursor")
+    if not all(value is None or isinstance(value, (str, int, float)) for value in values):
+        raise ValueError("malformed cursor")
+    return values
+
+def build_keyset_query(sort_list: List[Tuple[str, int]], values: List[Any]) -> Dict:
+    """
+    Build the range predicate selecting the documents that come after the given
+    sort key values (keyset pagination).
+    
+    Example: [("cited_by_count", -1), ("_id", 1)], [42, "W1"] ->
+        {"$or": [{"cited_by_count": {"$lt": 42}},
+                 {"cited_by_count": 42, "_id": {"$gt": "W1"}}]}
+    """
+    if len(values) != len(sort_list):
+        raise ValueError("cursor does not match the sort order")
+    
+    or_conditions = []
+    for i, (field, direction) in enumerate(sort_list):
+        condition = {prev_field: prev_value for (prev_field, _), prev_value in zip(sort_list[:i], values[:i])}
+        condition[field] = {"$lt" if direction == -1 else "$gt": values[i]}
+        or_conditions.append(condition)
+    
+    return {"$or": or_conditions}
@@ -1,22 +1,34 @@
 """Base handlers for OpenAlex API endpoints"""
 
+import asyncio
 from typing import Optional, Any, Dict, List, Tuple
 from fastapi import HTTPException, Query
-from motor.motor_asyncio import AsyncIOMotorCollection
 from pymongo import DESCENDING
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.errors import ExecutionTimeout, OperationFailure
 import logging
 from time import perf_counter
 
 from elastic_index import ESIndex
+from cache_utils import count_cache, make_cache_key
 
-from filter_utils import parse_filter_param, parse_sort_param, parse_select_param, parse_group_by_param
+from filter_utils import (
+    parse_filter_param, parse_sort_param, parse_select_param, parse_group_by_param, build_name_filter,
+    check_pipeline_order, get_field_value, normalize_entity_id, encode_cursor, decode_cursor, build_keyset_query,
+    DEFAULT_LIST_PROJECTIONS, LARGE_ENTITY_FIELDS, GROUP_BY_INDEXED_FIELDS
+)
+
+# Time limit for exact counts of filtered queries; slower counts are reported as unknown
+COUNT_MAX_TIME_MS = 500
 
 class BaseEntityHandler:
     """Base handler for all entity types (works, authors, concepts, etc.)"""
     
-    def __init__(self, collection: AsyncIOMotorCollection, entity_name: str):
+    def __init__(self, collection: AsyncCollection, entity_name: str, list_projection: Optional[Dict[str, int]] = None):
         self.collection = collection
         self.entity_name = entity_name
+        # Fields returned by list and search endpoints unless a select is given
+        self._list_projection = list_projection or DEFAULT_LIST_PROJECTIONS.get(collection.name)
         self.esindex = ESIndex()
         self.logger = logging.getLogger(f"handlers.{entity_name}")
         self.useElasticSearch = True  # Set to False to disable Elasticsearch usage
@@ -25,10 +37,32 @@ class BaseEntityHandler:
         """Returns whether debug logging is enabled"""
         return self.logger.isEnabledFor(logging.DEBUG)
 
+    def list_projection(self) -> Optional[Dict[str, int]]:
+        """Returns the default projection for list and search results (a copy, safe to extend)"""
+        return dict(self._list_projection) if self._list_projection else None
+
+    async def count_entities(self, query: Dict[str, Any]) -> Optional[int]:
+        """
+        Count matching entities; unfiltered counts come from collection metadata, filtered ones are cached briefly.
+        Returns None if an exact count exceeds COUNT_MAX_TIME_MS.
+        """
+        if not query:
+            return await self.collection.estimated_document_count()
+
+        cache_key = make_cache_key(f"{self.collection.name}.count", query=query)
+        total_count = count_cache.get(cache_key)
+        if total_count is None:
+            try:
+                total_count = await self.collection.count_documents(query, maxTimeMS=COUNT_MAX_TIME_MS)
+            except ExecutionTimeout:
+                self.logger.warning(f"Count exceeded {COUNT_MAX_TIME_MS}ms for query: {query}")
+                return None
+            count_cache.set(cache_key, total_count)
+        return total_count
+
     async def list_entities(
         self,
         name: Optional[str] = None,
-        page: int = 1,
         per_page: int = 25,
         sort_field: str = "works_count",
         filter_param: Optional[str] = None,
@@ -37,19 +71,31 @@ class BaseEntityHandler:
         title: Optional[str] = None,
         year: Optional[int] = None,
         type: Optional[str] = None,
-        extra_filters: Dict = None
+        extra_filters: Dict = None,
+        contains: bool = False,
+        cursor: Optional[str] = None,
+        include_count: bool = False
     ) -> Dict[str, Any]:
-        """Generic method for listing entities with pagination"""
+        """
+        Generic method for listing entities with pagination
+        
+        Pages are addressed by the cursor returned as meta.next_cursor, which
+        continues after the last sort key seen, so deep pages cost the same as
+        the first one. The total count is only computed when include_count is set.
+        """
         query = {}
         
-        # Handle entity-specific name field
-        if name:
-            name_field = "title" if self.entity_name == "work" else "display_name"
-            query[name_field] = {"$regex": name, "$options": "i"}
+        # Handle entity-specific name field and the work-specific title filter
+        try:
+            if name:
+                name_field = "title" if self.entity_name == "work" else "display_name"
+                query.update(build_name_filter(name_field, name, contains))
+            if title:
+                query.update(build_name_filter("title", title, contains))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
             
-        # Handle work-specific filters
-        if title:
-            query["title"] = {"$regex": title, "$options": "i"}
+        # Handle other work-specific filters
         if year:
             query["publication_year"] = year
         if type:
@@ -65,7 +111,7 @@ class BaseEntityHandler:
             query.update(extra_filters)
         
         # Parse sorting parameters
-        sort_specs = parse_sort_param(sort_param, self.entity_name)
+        sort_specs = parse_sort_param(sort_param, self.collection.name)
         
         # Create sort list for MongoDB
         sort_list = []
@@ -79,51 +125,106 @@ class BaseEntityHandler:
             else:
                 sort_list.append((field, direction))
                 
+        # Text matches are ranked by relevance unless another sort was requested
+        by_relevance = "$text" in query and (
+            not sort_param or ("score", "textScore") in sort_specs
+        )
+        
         # If no valid sort fields, use default
-        if not sort_list:
+        if by_relevance:
+            sort_list = [("score", {"$meta": "textScore"})]
+        elif not sort_list:
             sort_list = [(sort_field, DESCENDING)]
+        
+        # Break ties on _id so the order (and thus cursor pagination) is deterministic
+        if not by_relevance and not any(field == "_id" for field, _ in sort_list):
+            sort_list.append(("_id", 1))
             
-        # Handle field selection
-        projection = parse_select_param(select_param)
-            
-        skip = (page - 1) * per_page
+        # Handle field selection, falling back to the slim list projection
+        projection = parse_select_param(select_param) or self.list_projection()
+        
+        if by_relevance:
+            projection = projection or {}
+            projection["score"] = {"$meta": "textScore"}
+        elif projection:
+            # The sort keys are needed to build the next cursor
+            for field, _ in sort_list:
+                if not any(field == selected or field.startswith(selected + ".") for selected in projection):
+                    projection[field] = 1
         
-        # Apply query with sort and projection
-        cursor = self.collection.find(query, projection)
+        # Continue after the last document of the previous page if a cursor is given.
+        # Text scores cannot be range-queried, so relevance-ranked cursors carry an offset.
+        find_query = query
+        skip = 0
+        if cursor:
+            try:
+                cursor_values = decode_cursor(cursor)
+                if by_relevance:
+                    # (the type filter parameter shadows the builtin here, so no type() checks)
+                    offset = cursor_values[0] if len(cursor_values) == 1 else None
+                    if not isinstance(offset, int) or isinstance(offset, bool) or offset < 0:
+                        raise ValueError("cursor does not match the sort order")
+                    skip = offset
+                else:
+                    keyset_query = build_keyset_query(sort_list, cursor_values)
+                    find_query = {"$and": [query, keyset_query]} if query else keyset_query
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
         
-        # Apply sorting
-        if sort_list:
-            # Convert to MongoDB sort format
-            cursor = cursor.sort(sort_list)
+        # Apply query with sort and projection, fetching one extra document to detect more pages
+        db_cursor = self.collection.find(find_query, projection).sort(sort_list)
+        if skip:
+            db_cursor = db_cursor.skip(skip)
+        page_results = db_cursor.limit(per_page + 1).to_list(per_page + 1)
         
-        total_count = await self.collection.count_documents(query)
-        results = await cursor.skip(skip).limit(per_page).to_list(per_page)
+        # Count concurrently with the page query when a total was requested
+        total_count = None
+        if include_count:
+            results, total_count = await asyncio.gather(page_results, self.count_entities(query))
+        else:
+            results = await page_results
+        
+        has_more = len(results) > per_page
+        results = results[:per_page]
+        
+        next_cursor = None
+        if has_more:
+            if by_relevance:
+                next_cursor = encode_cursor([skip + per_page])
+            else:
+                next_cursor = encode_cursor([get_field_value(results[-1], field) for field, _ in sort_list])
+        
+        meta = {
+            "count": len(results),
+            "per_page": per_page,
+            "has_more": has_more,
+            "next_cursor": next_cursor
+        }
+        if include_count:
+            meta["total_count"] = total_count
+            meta["total_pages"] = (total_count + per_page - 1) // per_page if total_count is not None else None
         
         return {
-            "meta": {
-                "count": len(results),
-                "total_count": total_count,
-                "page": page,
-                "per_page": per_page,
-                "total_pages": (total_count + per_page - 1) // per_page
-            },
+            "meta": meta,
             "results": results
         }
 
-    async def get_entity(self, entity_id: str, select_param: Optional[str] = None) -> Dict[str, Any]:
+    async def get_entity(self, entity_id: str, select_param: Optional[str] = None, full: bool = False) -> Dict[str, Any]:
         """Generic method for getting a single entity by ID"""
-        # Handle field selection
+        # Handle field selection; without one, leave out large fields unless the full document is requested
         projection = parse_select_param(select_param)
+        if not projection and not full:
+            projection = {field: 0 for field in LARGE_ENTITY_FIELDS.get(self.collection.name, [])}
         
-        # Check both _id and id fields for the entity
-        entity = await self.collection.find_one({"_id": entity_id}, projection)
+        # The _id is the short form of the OpenAlex id, so both forms resolve to a single
+        # _id lookup; strings that cannot be an OpenAlex ID are rejected without a query
+        short_id = normalize_entity_id(entity_id)
+        entity = await self.collection.find_one({"_id": short_id}, projection) if short_id else None
         if not entity:
-            entity = await self.collection.find_one({"id": entity_id}, projection)
-            if not entity:
-                raise HTTPException(
-                    status_code=404, 
-                    detail=f"{self.entity_name} not found"
-                )
+            raise HTTPException(
+                status_code=404, 
+                detail=f"{self.entity_name} not found"
+            )
         return entity
 
 
@@ -134,7 +235,8 @@ class BaseEntityHandler:
             index=index_name,
             query=query,
             skip=skip,
-            limit=limit
+            limit=limit,
+            source=False
         )
         return result
 
@@ -160,6 +262,12 @@ class BaseEntityHandler:
             if filter_query:
                 self.logger.debug(f"Filter query: {filter_query}")
             
+        # Only fetch the fields that are returned
+        if select_param:
+            projection = parse_select_param(select_param)
+        elif not projection:
+            projection = self.list_projection()
+
         try:
             documents = []
             logger.debug(f"SEARCH " + self.entity_name)
@@ -173,13 +281,21 @@ class BaseEntityHandler:
                 total = found["total"]
                 has_more = total > (skip + limit)
                 
-                # Get the IDs in ranked order from Elasticsearch
-                ids = [doc["id"] for doc in found["results"]]
+                # Get the IDs in ranked order from Elasticsearch (only the ids and
+                # scores of the requested page are transferred; documents come from MongoDB)
+                scores = {doc["id"]: doc["score"] for doc in found["results"]}
+                ids = list(scores)
                 
                 # Get documents from MongoDB while preserving Elasticsearch order
-                mongo_docs = {}
-                async for doc in self.collection.find({"id": {"$in": ids}}, projection):
-                    mongo_docs[doc["id"]] = doc
+                # ("id" is needed to match them up, even if not selected)
+                if projection:
+                    projection = {**projection, "id": 1}
+                # Fetch the page in one batch rather than awaiting each document
+                # (no hits, or a page past the end, needs no MongoDB query)
+                docs = []
+                if ids:
+                    docs = await self.collection.find({"id": {"$in": ids}}, projection).batch_size(len(ids)).to_list(len(ids))
+                mongo_docs = {doc["id"]: doc for doc in docs}
                 
                 # Preserve the order from Elasticsearch results
                 documents = []
@@ -187,9 +303,7 @@ class BaseEntityHandler:
                     if id in mongo_docs:
                         doc = mongo_docs[id]
                         # Add the search score from Elasticsearch
-                        es_doc = next((d for d in found["results"] if d["id"] == id), None)
-                        if es_doc:
-                            doc["_score"] = es_doc["score"]
+                        doc["_score"] = scores[id]
                         documents.append(doc)
             else:
                 logger.debug(f"Use Basic Search")
@@ -211,43 +325,37 @@ class BaseEntityHandler:
                 if not projection:
                     projection = {}
                 
-                # Override with select parameter if provided
-                if select_param:
-                    projection = parse_select_param(select_param)
-                
-                # Add scoring if needed
-                use_scoring = explain_score or (sort_param and "relevance_score" in sort_param)
+                # Rank by the text score unless another sort is requested
+                use_scoring = explain_score or not sort_param or "relevance_score" in sort_param
                 if use_scoring and "score" not in projection:
                     projection["score"] = {"$meta": "textScore"}
 
-                logger.debug(f"start finding")
-
-                # Create cursor first
                 cursor = self.collection.find(search_query, projection)
-                
-                # Instead of getting exact count, use limit+1 to check if there are more results
-                total_cursor = self.collection.find(search_query).limit(limit + skip + 1)
-                total_docs = await total_cursor.to_list(None)
-                total = len(total_docs)
-                has_more = total > (limit + skip)
-                
-                logger.debug(f"found something")
 
-                # Add sorting if specified
+                # Add sorting if specified (relevance_score maps to the text score)
+                sort_list = []
                 if sort_param:
-                    sort_specs = parse_sort_param(sort_param, self.entity_name)
-                    for field, direction in sort_specs:
-                        if field != "relevance_score":
-                            cursor = cursor.sort(field, direction)
-                elif use_scoring:
-                    # Default to score-based sorting if scoring is enabled
-                    cursor = cursor.sort([("score", {"$meta": "textScore"})])
+                    for field, direction in parse_sort_param(sort_param, self.collection.name):
+                        if field == "score" and direction == "textScore":
+                            sort_list.append(("score", {"$meta": "textScore"}))
+                        else:
+                            sort_list.append((field, direction))
+                else:
+                    # Default to relevance, breaking ties by citations; the text index
+                    # yields matches ranked, so only the top skip + limit are sorted
+                    sort_list = [("score", {"$meta": "textScore"}), ("cited_by_count", DESCENDING)]
+                if sort_list:
+                    cursor = cursor.sort(sort_list)
                 
                 if self.verbose():
                     logger.debug(f"Fetching documents with skip={skip}, limit={limit}")
                 
-                # Get results using the documents we already fetched
-                documents = total_docs[skip:skip + limit] if total_docs else []
+                # Sort, skip and limit on the server in a single query; instead of getting
+                # an exact count, fetch one extra document to check if there are more results
+                documents = await cursor.skip(skip).limit(limit + 1).to_list(limit + 1)
+                has_more = len(documents) > limit
+                documents = documents[:limit]
+                total = skip + len(documents) + (1 if has_more else 0)
             
 
             if not documents:
@@ -316,25 +424,36 @@ class BaseEntityHandler:
         pipeline = parse_group_by_param(group_by)
         
         # Add match stage at the beginning if there are filters
+        aggregate_options = {}
         if query:
             pipeline.insert(0, {"$match": query})
+        elif group_by in GROUP_BY_INDEXED_FIELDS.get(self.collection.name, []):
+            # Unfiltered groupings read the whole collection; walk the group field's index,
+            # sorted on the field so $group is fed in index order
+            pipeline.insert(0, {"$sort": {group_by: 1}})
+            aggregate_options["hint"] = {group_by: 1}
             
-        # Run the aggregation
-        results = await self.collection.aggregate(pipeline).to_list(length=None)
-        
-        # Count total unique values
-        total_groups = len(results)
+        # Run the aggregation, building the response entries while streaming the cursor
+        try:
+            cursor = await self.collection.aggregate(check_pipeline_order(pipeline), **aggregate_options)
+        except OperationFailure:
+            if "hint" not in aggregate_options:
+                raise
+            # The index isn't there (yet, see db_indexes); group without it
+            self.logger.warning(f"No index on {group_by} to group {self.collection.name} by, grouping without it")
+            cursor = await self.collection.aggregate(check_pipeline_order(pipeline[1:]))
+        groups = [
+            {
+                "key": result.get("key"),
+                "count": result.get("count")
+            }
+            async for result in cursor
+        ]
         
         return {
             "meta": {
-                "count": total_groups,
+                "count": len(groups),
                 "group_by": group_by
             },
-            "group_by": [
-                {
-                    "key": result.get("key"),
-                    "count": result.get("count")
-                }
-                for result in results
-            ]
+            "group_by": groups
         }
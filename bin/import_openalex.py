@@ -88,8 +88,17 @@ def process_entity(data, entity_type, update_date, part_file):
     data['_update_date'] = update_date
     data['_update_part'] = str(part_file)
     
+    # Lowercased copy of the name for index-backed prefix filters; works are
+    # filtered by title only (see filter_utils.build_name_filter)
+    name_field = "title" if entity_type == "works" else "display_name"
+    if isinstance(data.get(name_field), str):
+        data[f"{name_field}_lc"] = data[name_field].lower()
+    
     # Process references to other entities
     if entity_type == "works":
+        # Queue the work for update_openalex_index.py (citation key and search blob)
+        data["_needs_keying"] = True
+
         # Process author IDs safely
         authorships = data.get("authorships", [])
         if isinstance(authorships, list):
@@ -15,7 +15,7 @@ Options:
 import asyncio
 import argparse
 import logging
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
 from elastic_index import ESIndex
 
 # Configure logging
@@ -41,7 +41,7 @@ async def index_collection(db, es_index, collection_name: str, batch_size: int =
     print(f"Indexing {'all' if limit is None else limit} documents from {collection_name} (estimated total: {total_docs})")
     
     # Start a session to handle the cursor timeout properly
-    async with await db.client.start_session() as session:
+    async with db.client.start_session() as session:
         # Configure cursor with optimized settings for large collections
         cursor = collection.find(
             {}, 
@@ -238,7 +238,7 @@ async def main():
             return
 
         # Initialize MongoDB client for indexing
-        mongo_client = AsyncIOMotorClient("mongodb://localhost:27017")
+        mongo_client = AsyncMongoClient("mongodb://localhost:27017")
         db = mongo_client.openalex
         
         cursors = []  # Keep track of cursors for cleanup
@@ -264,7 +264,7 @@ async def main():
                 # Clean up any remaining cursors
                 for cursor in cursors:
                     try:
-                        cursor.close()
+                        await cursor.close()
                     except:
                         pass
     finally:
@@ -272,7 +272,7 @@ async def main():
         if es_index:
             await es_index.close()
         if mongo_client:
-            mongo_client.close()
+            await mongo_client.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -6,94 +6,160 @@ This script creates a FastAPI server to query the local OpenAlex MongoDB databas
 It provides endpoints to search and retrieve works, authors, and concepts.
 
 Usage:
-    uvicorn serve_openalex:app [--host HOST] [--port PORT] [--reload]
+    uvicorn serve_openalex:app --loop uvloop --http httptools [--host HOST] [--port PORT] [--reload]
+    python serve_openalex.py  # production: uvloop/httptools with one worker per CPU (API_HOST, API_PORT, API_WORKERS)
 
 Requirements:
-    pip install fastapi uvicorn motor
+    pip install fastapi "uvicorn[standard]" pymongo orjson
 """
 
 import os
+import asyncio
+from contextlib import asynccontextmanager
 from typing import List, Optional, Dict, Any
-from datetime import datetime
-import json
 import base64
+import queue
 import logging
 import logging.handlers
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import DESCENDING
-from bson import ObjectId
+from fastapi.middleware.gzip import GZipMiddleware
+from pymongo import AsyncMongoClient, DESCENDING
+from pymongo.asynchronous.database import AsyncDatabase
 
 from handlers import BaseEntityHandler
-from api_utils import MAX_RESULTS_PER_PAGE
+from api_utils import MAX_RESULTS_PER_PAGE, MongoJSONResponse
+from cache_utils import response_cache, query_cache, entity_caches, root_cache, make_cache_key, CACHE_HEADER
 from entity_router import create_entity_routers
+from db_indexes import ensure_indexes
 
 # MongoDB connection settings
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 
+# Connection pool settings (a pre-warmed pool, large enough for the concurrent
+# count/page and related-entity queries of many simultaneous requests)
+MONGO_POOL_OPTIONS = {
+    "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", "200")),
+    "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", "20")),
+    "maxIdleTimeMS": 60000,
+    "serverSelectionTimeoutMS": 2000,
+    "waitQueueTimeoutMS": 2000,
+    # zstd/snappy need pymongo[zstd,snappy]; unavailable ones are skipped, zlib is always available
+    "compressors": "zstd,snappy,zlib",
+    "zlibCompressionLevel": -1,
+    "retryReads": True,
+}
+
+# Origins allowed to call the API from a browser (comma-separated); credentials are
+# allowed, so this must be an explicit list rather than "*"
+ALLOWED_ORIGINS = [
+    origin.strip() for origin in os.getenv("ALLOWED_ORIGINS", "").split(",") if origin.strip()
+] or ["http://localhost:3000"]
+
+# Entity collections, warmed up at startup and counted by the root endpoint
+ENTITY_COLLECTIONS = (
+    "works", "authors", "concepts", "institutions", "publishers",
+    "sources", "topics", "fields", "subfields", "domains"
+)
+
 # Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Attach the handlers only once per process: `python serve_openalex.py` imports this
+# module a second time (as serve_openalex) when uvicorn loads the app
+queue_handler = next((h for h in logger.handlers if isinstance(h, logging.handlers.QueueHandler)), None)
+if queue_handler is None:
+    # Create file handler
+    file_handler = logging.handlers.RotatingFileHandler(
+        'server.log',
+        maxBytes=10*1024*1024,  # 10MB
+        backupCount=5
+    )
+    file_handler.setLevel(logging.INFO)
+
+    # Create console handler
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)
+
+    # Create formatter
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    file_handler.setFormatter(formatter)
+    console_handler.setFormatter(formatter)
+
+    # Log through a queue, so the event loop only enqueues records and a background
+    # thread does the writing
+    log_queue = queue.Queue(-1)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    logger.addHandler(queue_handler)
+    queue_handler.listener.start()
+log_listener = queue_handler.listener
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the MongoDB client and register the entity routers for the lifetime of the app"""
+    client = AsyncMongoClient(MONGO_URI, **MONGO_POOL_OPTIONS)
+    db = client.openalex
 
-# Create file handler
-file_handler = logging.handlers.RotatingFileHandler(
-    'server.log',
-    maxBytes=10*1024*1024,  # 10MB
-    backupCount=5
-)
-file_handler.setLevel(logging.INFO)
-
-# Create console handler
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
-
-# Create formatter
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
-console_handler.setFormatter(formatter)
-
-# Add handlers to logger
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
-
-handlers = {}  # Will store our entity handlers
-
-
-
-class MongoJSONEncoder(json.JSONEncoder):
-    """Custom JSON encoder for MongoDB types"""
-    def default(self, obj):
-        if isinstance(obj, ObjectId):
-            return str(obj)
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return json.JSONEncoder.default(self, obj)
-
-def jsonable_encoder(obj):
-    """Convert MongoDB documents to JSON-serializable objects"""
-    if isinstance(obj, dict):
-        return {key: jsonable_encoder(value) for key, value in obj.items()}
-    elif isinstance(obj, list):
-        return [jsonable_encoder(item) for item in obj]
-    elif isinstance(obj, ObjectId):
-        return str(obj)
-    elif isinstance(obj, datetime):
-        return obj.isoformat()
-    return obj
+    # Fail fast if the server is unreachable, then warm up the pool and the collections'
+    # metadata so the first requests don't pay for connection setup
+    await client.admin.command("ping")
+    await asyncio.gather(
+        *(db.command("ping") for _ in range(MONGO_POOL_OPTIONS["minPoolSize"])),
+        *(db[name].estimated_document_count() for name in ENTITY_COLLECTIONS)
+    )
+    
+    # Initialize handlers for each entity type
+    handlers = {
+        "works": BaseEntityHandler(db.works, "work"),
+        "authors": BaseEntityHandler(db.authors, "authors"),
+        "concepts": BaseEntityHandler(db.concepts, "concepts"),
+        "institutions": BaseEntityHandler(db.institutions, "institutions"),
+        "publishers": BaseEntityHandler(db.publishers, "publishers"),
+        "sources": BaseEntityHandler(db.sources, "sources"),
+        "topics": BaseEntityHandler(db.topics, "topics"),
+        "fields": BaseEntityHandler(db.fields, "fields"),
+        "subfields": BaseEntityHandler(db.subfields, "subfields"),
+        "domains": BaseEntityHandler(db.domains, "domains")
+    }
+    app.state.db = db
+    app.state.handlers = handlers
+    
+    # Register all entity routers
+    create_entity_routers(app, db, handlers)
+
+    # Build missing query indexes in the background so startup isn't stalled by a long build
+    index_task = asyncio.create_task(ensure_indexes(db))
+
+    try:
+        yield
+    finally:
+        index_task.cancel()
+        await client.close()
+        log_listener.stop()
+
+def get_db(request: Request) -> AsyncDatabase:
+    """Dependency returning the database opened by the lifespan handler"""
+    return request.app.state.db
 
 # Create FastAPI app
 app = FastAPI(
     title="OpenAlex Local API",
     description="API for querying local OpenAlex data",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=MongoJSONResponse,
+    lifespan=lifespan
 )
 
 # Enable CORS
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -102,86 +168,79 @@ app.add_middleware(
     max_age=600,
 )
 
-# Override FastAPI's default JSON encoder
-app.json_encoder = MongoJSONEncoder
-
-# MongoDB client
-client = None
-db = None
-
-@app.on_event("startup")
-async def startup_db_client():
-    global client, db, handlers
-    client = AsyncIOMotorClient(MONGO_URI)
-    db = client.openalex
-    
-    # Initialize handlers for each entity type
-    handlers["works"] = BaseEntityHandler(db.works, "work")
-    handlers["authors"] = BaseEntityHandler(db.authors, "authors")
-    handlers["concepts"] = BaseEntityHandler(db.concepts, "concepts")
-    handlers["institutions"] = BaseEntityHandler(db.institutions, "institutions")
-    handlers["publishers"] = BaseEntityHandler(db.publishers, "publishers")
-    handlers["sources"] = BaseEntityHandler(db.sources, "sources")
-    handlers["topics"] = BaseEntityHandler(db.topics, "topics")
-    handlers["fields"] = BaseEntityHandler(db.fields, "fields")
-    handlers["subfields"] = BaseEntityHandler(db.subfields, "subfields")
-    handlers["domains"] = BaseEntityHandler(db.domains, "domains")
-    
-    # Register all entity routers
-    create_entity_routers(app, db, handlers, jsonable_encoder)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    if client:
-        client.close()
+# Compress larger responses; OpenAlex documents are repetitive JSON and shrink several times
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=4)
+
+# Endpoints listed by the root endpoint (built once, not per request)
+API_ENDPOINTS = (
+    {"path": "/works", "description": "List and search works"},
+    {"path": "/works/{id}", "description": "Get details of a specific work"},
+    {"path": "/authors", "description": "List and search authors"},
+    {"path": "/authors/{id}", "description": "Get details of a specific author"},
+    {"path": "/concepts", "description": "List and search concepts"},
+    {"path": "/concepts/{id}", "description": "Get details of a specific concept"},
+    {"path": "/institutions", "description": "List and search institutions"},
+    {"path": "/institutions/{id}", "description": "Get details of a specific institution"},
+    {"path": "/publishers", "description": "List and search publishers"},
+    {"path": "/publishers/{id}", "description": "Get details of a specific publisher"},
+    {"path": "/sources", "description": "List and search publication sources (journals, conferences, etc.)"},
+    {"path": "/sources/{id}", "description": "Get details of a specific source"},
+    {"path": "/topics", "description": "List and search research topics"},
+    {"path": "/topics/{id}", "description": "Get details of a specific topic"},
+    {"path": "/fields", "description": "List and search research fields"},
+    {"path": "/fields/{id}", "description": "Get details of a specific field"},
+    {"path": "/subfields", "description": "List and search research subfields"},
+    {"path": "/subfields/{id}", "description": "Get details of a specific subfield"},
+    {"path": "/domains", "description": "List and search research domains"},
+    {"path": "/domains/{id}", "description": "Get details of a specific domain"}
+)
 
 @app.get("/")
-async def get_root():
+async def get_root(db: AsyncDatabase = Depends(get_db)):
     """Get API information and database status"""
-    # Get last import info
-    metadata = await db.metadata.find_one({"key": "last_import"})
-    
-    # Get estimated counts (much faster than exact counts)
-    entity_counts = {
-        "works": await db.works.estimated_document_count(),
-        "authors": await db.authors.estimated_document_count(),
-        "concepts": await db.concepts.estimated_document_count(),
-        "institutions": await db.institutions.estimated_document_count(),
-        "publishers": await db.publishers.estimated_document_count(),
-        "sources": await db.sources.estimated_document_count(),
-        "topics": await db.topics.estimated_document_count(),
-        "fields": await db.fields.estimated_document_count(),
-        "subfields": await db.subfields.estimated_document_count(),
-        "domains": await db.domains.estimated_document_count()
-    }
+    cache_key = make_cache_key("root")
+    cached = root_cache.get(cache_key)
+    if cached is not None:
+        # The cache holds the rendered body, so hits skip JSON encoding as well
+        return Response(content=cached, media_type="application/json", headers={CACHE_HEADER: "HIT"})
+
+    # Get estimated counts (much faster than exact counts) and the last import info concurrently
+    *counts, metadata = await asyncio.gather(
+        *(db[name].estimated_document_count() for name in ENTITY_COLLECTIONS),
+        db.metadata.find_one({"key": "last_import"})
+    )
+    entity_counts = dict(zip(ENTITY_COLLECTIONS, counts))
     
     api_info = {
         "name": "OpenAlex Local API",
         "version": "1.0.0",
         "last_import": metadata["value"] if metadata else None,
         "entity_counts": entity_counts,
-        "endpoints": [
-            {"path": "/works", "description": "List and search works"},
-            {"path": "/works/{id}", "description": "Get details of a specific work"},
-            {"path": "/authors", "description": "List and search authors"},
-            {"path": "/authors/{id}", "description": "Get details of a specific author"},
-            {"path": "/concepts", "description": "List and search concepts"},
-            {"path": "/concepts/{id}", "description": "Get details of a specific concept"},
-            {"path": "/institutions", "description": "List and search institutions"},
-            {"path": "/institutions/{id}", "description": "Get details of a specific institution"},
-            {"path": "/publishers", "description": "List and search publishers"},
-            {"path": "/publishers/{id}", "description": "Get details of a specific publisher"},
-            {"path": "/sources", "description": "List and search publication sources (journals, conferences, etc.)"},
-            {"path": "/sources/{id}", "description": "Get details of a specific source"},
-            {"path": "/topics", "description": "List and search research topics"},
-            {"path": "/topics/{id}", "description": "Get details of a specific topic"},
-            {"path": "/fields", "description": "List and search research fields"},
-            {"path": "/fields/{id}", "description": "Get details of a specific field"},
-            {"path": "/subfields", "description": "List and search research subfields"},
-            {"path": "/subfields/{id}", "description": "Get details of a specific subfield"},
-            {"path": "/domains", "description": "List and search research domains"},
-            {"path": "/domains/{id}", "description": "Get details of a specific domain"}
-        ]
+        "endpoints": API_ENDPOINTS
     }
-    return api_info
+    response = MongoJSONResponse(api_info, headers={CACHE_HEADER: "MISS"})
+    root_cache.set(cache_key, response.body)
+    return response
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Get hit rate and size of the response caches"""
+    return {
+        "responses": response_cache.stats(),
+        "queries": query_cache.stats(),
+        "root": root_cache.stats(),
+        "entities": {entity_type: cache.stats() for entity_type, cache in entity_caches.items()}
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
 
+    uvicorn.run(
+        "serve_openalex:app",
+        host=os.getenv("API_HOST", "127.0.0.1"),
+        port=int(os.getenv("API_PORT", "9020")),
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("API_WORKERS", os.cpu_count() or 1))
+    )
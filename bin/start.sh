@@ -1,5 +1,5 @@
 
 
 
-cd /home/jlincke/lively4/my-literature-db/bin && uvicorn serve_openalex:app --host 172.16.64.136 --port 9020 --reload
+cd /home/jlincke/lively4/my-literature-db/bin && uvicorn serve_openalex:app --host 172.16.64.136 --port 9020 --loop uvloop --http httptools --reload
 
@@ -28,13 +28,16 @@ Options:
 import os
 import re
 import sys
+import asyncio
 import logging
 import argparse
 from typing import List, Optional
 from datetime import datetime
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
 
-from pymongo import MongoClient, ASCENDING, UpdateOne
-from pymongo.errors import PyMongoError
+from pymongo import AsyncMongoClient, ASCENDING, DESCENDING, IndexModel, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
 
 # Configure logging
 logging.basicConfig(
@@ -47,22 +50,60 @@ logger = logging.getLogger("openalex-indexer")
 # MongoDB connection settings
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 
+# Collections whose indexes are built at the same time
+INDEX_BUILD_CONCURRENCY = 4
+
+# Text indexes ignore per-document language fields (no_language doesn't exist)
+TEXT_INDEX_OPTIONS = {
+    "default_language": "english",
+    "language_override": "no_language"
+}
+
+# Works per cursor batch and bulk write; the maximum is the server's maxWriteBatchSize
+DEFAULT_BATCH_SIZE = 10000
+MAX_BATCH_SIZE = 100000
+
+# Batches of works that may be keyed or written while the next batch is read
+MAX_PENDING_BATCHES = (os.cpu_count() or 1) + 2
+
 # Stop words for citation key generation
 STOP_WORDS = {
     'english': {'a', 'am', 'an', 'as', 'at', 'be', 'by', 'in', 'is', 'it', 'of', 'on', 'to', 
                'the', 'and', 'from', 'out', 'for', 'but'},
     'german': {'so', 'als', 'der', 'die', 'das', 'und', 'oder', 'aber', 'für'}
 }
+_STOP_WORDS = frozenset(STOP_WORDS['english']) | frozenset(STOP_WORDS['german'])
+
+# Patterns for citation key generation, compiled once instead of on every work
+_RE_BASED = re.compile(r'-based\s')
+_RE_NONWORD = re.compile(r'[^\w\s-]')
+_RE_SPLIT = re.compile(r'[ -\/_]|(?=[0-9]+)')
+
+# Characters dropped from last names (spaces, hyphens, apostrophes)
+_LASTNAME_STRIP = str.maketrans('', '', " -'")
+
+# German umlauts and their alternative spelling
+_UMLAUT_TABLE = str.maketrans({
+    'ä': 'ae',
+    'ö': 'oe',
+    'ü': 'ue',
+    'ß': 'ss',
+    'Ä': 'Ae',
+    'Ö': 'Oe',
+    'Ü': 'Ue'
+})
 
 def clean_title(title: str) -> str:
     """Clean title by removing special characters and normalizing spaces"""
     if not title:
         return ""
-    # Replace specific patterns
-    title = re.sub(r'-based\s', 'based ', title)
-    title = re.sub(r'-the-', 'the', title)
+    # Replace specific patterns (cheap substring checks first, most titles contain neither)
+    if '-based' in title:
+        title = _RE_BASED.sub('based ', title)
+    if '-the-' in title:
+        title = title.replace('-the-', 'the')
     # Remove special characters but keep spaces and hyphens
-    title = re.sub(r'[^\w\s-]', '', title)
+    title = _RE_NONWORD.sub('', title)
     return title.strip()
 
 def get_significant_initials(title: str, max_words: int = 3) -> str:
@@ -71,40 +112,22 @@ def get_significant_initials(title: str, max_words: int = 3) -> str:
         return ""
     
     # Clean and split the title
-    words = clean_title(title).replace('-based ', 'based ').replace('-the-', 'the')
-    words = re.split(r'[ -\/_]|(?=[0-9]+)', words)
+    words = _RE_SPLIT.split(clean_title(title))
     
-    # Filter and process words
-    significant_words = []
-    for word in words:
-        word = word.lower()
-        if (len(word) > 0 and 
-            word not in STOP_WORDS['english'] and 
-            word not in STOP_WORDS['german'] and 
-            not word[0].isdigit() and 
-            not re.match(r'^[\(\)\[\]\/\\]', word)):
-            significant_words.append(word)
+    # Filter and process words lazily; cleaning and splitting already removed brackets and slashes
+    significant_words = (
+        word for word in map(str.lower, words)
+        if word and word not in _STOP_WORDS and not word[0].isdigit()
+    )
     
     # Take first 3 significant words and get their initials
-    return ''.join(word[0].upper() for word in significant_words[:max_words])
+    return ''.join(word[0].upper() for word in islice(significant_words, max_words))
 
 def fix_umlauts(text: str) -> str:
     """Convert German umlauts to their alternative spelling"""
     if not text:
         return ""
-    
-    umlaut_map = {
-        'ä': 'ae',
-        'ö': 'oe',
-        'ü': 'ue',
-        'ß': 'ss',
-        'Ä': 'Ae',
-        'Ö': 'Oe',
-        'Ü': 'Ue'
-    }
-    for umlaut, replacement in umlaut_map.items():
-        text = text.replace(umlaut, replacement)
-    return text
+    return text.translate(_UMLAUT_TABLE)
 
 def generate_citation_key(work: dict) -> Optional[str]:
     """Generate citation key from work metadata"""
@@ -114,25 +137,25 @@ def generate_citation_key(work: dict) -> Optional[str]:
         if not authorships or not work.get('publication_year'):
             return None
 
-        first_author = authorships[0].get('author', {}).get('display_name', '')
+        try:
+            first_author = authorships[0]['author']['display_name']
+        except (KeyError, TypeError):
+            return None
         if not first_author or not first_author.strip():
             return None
 
         # Process author name
         if ',' in first_author:
-            last_name = first_author.split(',')[0]
+            last_name = first_author.partition(',')[0]
         else:
-            last_name_parts = first_author.split()
-            if not last_name_parts:
-                return None
-            last_name = last_name_parts[-1]
+            last_name = first_author.rsplit(None, 1)[-1]
 
         # Clean and normalize last name
         last_name = fix_umlauts(last_name)
-        clean_last_name = re.sub(r'[ \-\']', '', last_name)
+        clean_last_name = last_name.translate(_LASTNAME_STRIP)
         if not clean_last_name:
             return None
-        normalized_last_name = clean_last_name[0].upper() + clean_last_name[1:].lower()
+        normalized_last_name = clean_last_name.capitalize()
 
         # Get year and title initials
         year = str(work.get('publication_year'))
@@ -147,135 +170,163 @@ def generate_citation_key(work: dict) -> Optional[str]:
         logger.warning(f"Error generating citation key: {str(e)}")
         return None
 
-async def update_works_index(db, limit: Optional[int] = None, batch_size: int = 1000, force: bool = False) -> None:
-    """Update works collection with citation keys and indexes"""
+def generate_citation_keys(works: List[dict]) -> List[Optional[str]]:
+    """Generate the citation keys of a batch of works (runs in a worker process)"""
+    return [generate_citation_key(work) for work in works]
+
+async def update_works_index(db, limit: Optional[int] = None, batch_size: int = DEFAULT_BATCH_SIZE, force: bool = False) -> None:
+    """Update works with citation keys and search blobs (their indexes are built by create_indexes)"""
     try:
-        # Check and create necessary indexes if they don't exist
-        indexes = db.works.list_indexes().to_list(None)
-        existing_indexes = {idx['name'] for idx in indexes}
-        logger.info(f"Found existing indexes: {existing_indexes}")
-
-        # Create text index on search_blob if it doesn't exist
-        if 'search_blob_text' not in existing_indexes:
-            logger.info("Creating text index on search_blob (this may take a while)...")
-            logger.info("You can continue using the database while the index builds in the background")
-            start_time = datetime.now()
-            db.works.create_index(
-                [("search_blob", "text")],
-                default_language="english",  # Set default language
-                language_override="no_language",  # Use a field name that doesn't exist to prevent language override
-                background=True
+        existing_indexes = set(await db.works.index_information())
+
+        # Works that need updating carry a marker field (set by the import, removed below),
+        # so they are read from a small sparse index instead of scanning the whole collection.
+        # Works imported before the marker existed are marked once, when the index is created.
+        if 'needs_keying' not in existing_indexes:
+            logger.info("Marking works without citation key or search blob (this may take a while)...")
+            result = await db.works.update_many(
+                {"$or": [{"_citation_key": None}, {"search_blob": None}]},  # None also matches missing fields
+                {"$set": {"_needs_keying": True}}
             )
-            duration = datetime.now() - start_time
-            logger.info(f"Text index creation completed in {duration}")
-
-        # MongoDB automatically names indexes as fieldname_direction (e.g. field_1 for ascending)
-        required_indexes = [
-            ("_citation_key", ASCENDING),
-            ("title", ASCENDING),
-            ("publication_year", ASCENDING),
-            ("_author_ids", ASCENDING),
-            ("_concept_ids", ASCENDING)
-        ]
-
-        for field, direction in required_indexes:
-            index_name = f"{field}_1"
-            if index_name not in existing_indexes:
-                logger.info(f"Creating {field} index in background...")
-                db.works.create_index([(field, direction)], background=True)
-
-        # Process works in batches
-        updates = []
-        processed = 0
-        skipped = 0
+            logger.info(f"Marked {result.modified_count} works")
+            await db.works.create_index([("_needs_keying", ASCENDING)], name="needs_keying", sparse=True)
 
         # Build find query for works that need updating
-        find_query = {
-            "$or": [
-                {"_citation_key": {"$exists": False}},
-                {"_citation_key": None},
-                {"search_blob": {"$exists": False}},
-                {"search_blob": None}
-            ]
-        }
+        find_query = {"_needs_keying": True}
 
-        # Add projection to limit retrieved fields
+        # Search blobs are plain concatenations ("<author names> <year> <title>"), so they are
+        # built by the server and merged back in place, without a round trip through Python
+        logger.info("Building search blobs...")
+        start_time = datetime.now()
+        await db.works.aggregate([
+            {"$match": find_query if force else {**find_query, "search_blob": None}},
+            # One space-separated join over the author names, year and title, skipping empty parts
+            {"$project": {"search_blob": 1, "new_search_blob": {"$reduce": {
+                "input": {"$filter": {
+                    "input": {"$concatArrays": [
+                        {"$ifNull": ["$authorships.author.display_name", []]},
+                        [{"$toString": "$publication_year"}, "$title"]
+                    ]},
+                    "cond": {"$and": [{"$ne": ["$$this", None]}, {"$ne": ["$$this", ""]}]}
+                }},
+                "initialValue": "",
+                "in": {"$concat": [
+                    "$$value",
+                    {"$cond": [{"$eq": ["$$value", ""]}, "", " "]},
+                    "$$this"
+                ]}
+            }}}},
+            # Only write blobs that change (with --force most are rebuilt identically)
+            {"$match": {"$expr": {"$ne": ["$search_blob", "$new_search_blob"]}}},
+            {"$project": {"search_blob": "$new_search_blob"}},
+            {"$merge": {"into": "works", "whenMatched": "merge", "whenNotMatched": "discard"}}
+        ])
+        logger.info(f"Search blobs built in {datetime.now() - start_time}")
+
+        # Add projection to limit retrieved fields (only the first author's name, shaped as in
+        # the works, is needed for the citation key)
         projection = {
             "_id": 1,
-            "authorships": 1,
+            "authorships": {"$map": {
+                "input": {"$slice": [{"$ifNull": ["$authorships", []]}, 1]},
+                "in": {"author": {"display_name": "$$this.author.display_name"}}
+            }},
             "publication_year": 1,
             "title": 1,
-            "_citation_key": 1,
-            "search_blob": 1
+            "_citation_key": 1
         }
 
-        # Get estimated count for progress reporting
+        # Get count for progress reporting (only reads the entries of the sparse marker index)
         try:
-            total_estimate = db.works.count_documents(find_query)
+            total_estimate = await db.works.count_documents(find_query, hint="needs_keying")
             logger.info(f"Estimated documents needing updates: {total_estimate}")
         except Exception as e:
             logger.warning(f"Could not get document count estimate: {e}")
             total_estimate = None
 
-        cursor = db.works.find(find_query, projection)
-        if limit:
-            cursor = cursor.limit(limit)
-            total_estimate = limit
-
-        async for work in cursor:
-            # Generate citation key
-            citation_key = generate_citation_key(work)
+        # Process works in batches: citation keys are generated in worker processes (the
+        # regex-heavy key generation would otherwise hold the GIL) and written in the
+        # background, while the cursor reads on
+        batch = []
+        pending_batches = []
+        processed = 0
+        skipped = 0
+        loop = asyncio.get_running_loop()
 
-            # Create search blob combining all relevant fields
-            author_names = " ".join(
-                auth.get("author", {}).get("display_name", "")
-                for auth in work.get("authorships", [])
-            )
-            year = str(work.get("publication_year", ""))
-            title = work.get("title", "")
+        async def process_batch(executor, works):
+            nonlocal skipped
+            # A work moved by a concurrent write can be read twice; update it once
+            works = list({work["_id"]: work for work in works}.values())
 
-            # Combine fields with extra spaces to prevent unwanted word combinations
-            search_blob = f"{author_names} {year} {title}"
+            # Works that already have a key only need one with --force
+            missing_keys = works if force else [work for work in works if not work.get("_citation_key")]
+            citation_keys = await loop.run_in_executor(executor, generate_citation_keys, missing_keys) if missing_keys else []
 
-            # Create update operation
-            update = {"$set": {}}
-            if force or not work.get("_citation_key"):
+            # Create update operations (always removing the marker, so the work isn't read again)
+            updates = []
+            keyed_ids = set()
+            for work, citation_key in zip(missing_keys, citation_keys):
                 if citation_key:
-                    update["$set"]["_citation_key"] = citation_key
-            if force or not work.get("search_blob"):
-                update["$set"]["search_blob"] = search_blob
-
-            if update["$set"]:
-                updates.append(UpdateOne(
-                    {"_id": work["_id"]},
-                    update
+                    updates.append(UpdateOne(
+                        {"_id": work["_id"]},
+                        {"$set": {"_citation_key": citation_key}, "$unset": {"_needs_keying": ""}}
+                    ))
+                    keyed_ids.add(work["_id"])
+
+            # The other works only lose their marker, with a single operation for all of them
+            skipped_ids = [work["_id"] for work in works if work["_id"] not in keyed_ids]
+            if skipped_ids:
+                updates.append(UpdateMany(
+                    {"_id": {"$in": skipped_ids}},
+                    {"$unset": {"_needs_keying": ""}}
                 ))
-            else:
-                skipped += 1
-
-            processed += 1
-            if processed % 10000 == 0:  # Log progress every x documents
-                percentage = ((processed + skipped) / total_estimate) * 100 if total_estimate else 0
-                logger.info(f"Processed {processed} works, skipped {skipped} works so far. Progress: {percentage:.2f}%")
+                skipped += len(skipped_ids)
 
-            if len(updates) >= batch_size:
-                result = db.works.bulk_write(updates)
+            try:
+                await db.works.bulk_write(updates, ordered=False)
                 logger.info(f"Batch update completed. Processed {len(updates)} updates.")
-                updates = []
-
-                if total_estimate:
-                    logger.info(f"Progress: {processed + skipped}/{total_estimate} ({((processed + skipped)/total_estimate)*100:.1f}%)")
-                else:
-                    logger.info(f"Processed {processed} works, skipped {skipped} works.")
-
-                # Check if we've hit the limit
-                if limit and processed >= limit:
-                    break
-
-        # Process remaining updates
-        if updates:
-            result = db.works.bulk_write(updates)
-            processed += len(updates)
+            except BulkWriteError as e:
+                # The other writes of the batch still went through; failed works keep their marker
+                logger.warning(f"Batch update partially failed: {len(e.details['writeErrors'])} of {len(updates)} writes")
+
+        # no_cursor_timeout only protects the cursor while its server session lives; an explicit
+        # session is kept alive by the cursor's getMores, whereas an implicit one can expire
+        # after 30 idle minutes and take the cursor with it
+        async with db.client.start_session() as session:
+            # Fetch in batches matching the bulk writes; a full pass can outlive the idle cursor timeout.
+            # With --limit the server stops the cursor after that many works
+            cursor = db.works.find(find_query, projection, batch_size=batch_size, no_cursor_timeout=True,
+                                   session=session)
+            if limit:
+                cursor = cursor.limit(limit)
+                total_estimate = limit
+
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+                # Closed as soon as the pass ends or fails, as the server would keep it open otherwise
+                async with cursor:
+                    async for work in cursor:
+                        batch.append(work)
+
+                        processed += 1
+                        if processed % 10000 == 0:  # Log progress every x documents
+                            percentage = ((processed + skipped) / total_estimate) * 100 if total_estimate else 0
+                            logger.info(f"Processed {processed} works, skipped {skipped} works so far. Progress: {percentage:.2f}%")
+
+                        if len(batch) >= batch_size:
+                            pending_batches.append(asyncio.create_task(process_batch(executor, batch)))
+                            batch = []
+                            if len(pending_batches) >= MAX_PENDING_BATCHES:
+                                await pending_batches.pop(0)
+
+                            if total_estimate:
+                                logger.info(f"Progress: {processed + skipped}/{total_estimate} ({((processed + skipped)/total_estimate)*100:.1f}%)")
+                            else:
+                                logger.info(f"Processed {processed} works, skipped {skipped} works.")
+
+                # Process the remaining works and wait for the batches still in flight
+                if batch:
+                    pending_batches.append(asyncio.create_task(process_batch(executor, batch)))
+                await asyncio.gather(*pending_batches)
 
         logger.info(f"Completed processing {processed} works, skipped {skipped} works.")
 
@@ -286,70 +337,61 @@ async def update_works_index(db, limit: Optional[int] = None, batch_size: int =
         logger.error(f"Unexpected error: {str(e)}")
         raise
 
-def create_index(collection, index_fields, unique=False):
-    """Create an index on the specified fields if it doesn't exist"""
+async def create_missing_indexes(collection, models: List[IndexModel]):
+    """Create the indexes whose key pattern doesn't exist yet, with one createIndexes command"""
     try:
-        # Get the auto-generated index name that MongoDB would use
-        index_name = "_".join(f"{field}_{direction}" for field, direction in index_fields)
-        
-        # Check if index already exists
-        existing_indexes = collection.index_information()
-        existing_key_patterns = {
-            name: [tuple(key) for key in info['key']]
-            for name, info in existing_indexes.items()
-        }
-        
-        # Check if an index with the same key pattern exists
-        index_key_pattern = [tuple(field) for field in index_fields]
-        for existing_pattern in existing_key_patterns.values():
-            if existing_pattern == index_key_pattern:
-                logger.info(f"Index already exists for fields: {index_fields}")
-                return
-
-        # Create index if it doesn't exist
+        existing_indexes = await collection.index_information()
+        existing_key_patterns = [
+            [tuple(key) for key in info['key']]
+            for info in existing_indexes.values()
+        ]
+        # A collection can only have one text index, whatever its fields
+        has_text_index = any(key[1] == 'text' for pattern in existing_key_patterns for key in pattern)
+
+        missing = []
+        for model in models:
+            index_key_pattern = list(model.document['key'].items())
+            if (index_key_pattern in existing_key_patterns or
+                    (has_text_index and 'text' in model.document['key'].values())):
+                logger.info(f"Index already exists on {collection.name} for fields: {index_key_pattern}")
+            else:
+                missing.append(model)
+        if not missing:
+            return
+
         start_time = datetime.now()
-        collection.create_index(index_fields, unique=unique, background=True)
-        logger.info(f"Index created on fields: {index_fields} "
+        try:
+            await collection.create_indexes(missing)
+        except PyMongoError as e:
+            # One bad spec fails the whole command, so fall back to creating them one by one
+            logger.warning(f"Error creating indexes on {collection.name}, retrying one by one: {str(e)}")
+            for model in missing:
+                try:
+                    await collection.create_indexes([model])
+                except PyMongoError as e:
+                    logger.warning(f"Error creating index {model.document['name']} on {collection.name}: {str(e)}")
+        logger.info(f"{len(missing)} indexes created on {collection.name} "
                    f"in {datetime.now() - start_time} seconds")
     except PyMongoError as e:
-        logger.warning(f"Error creating index on {index_fields}: {str(e)}")
+        logger.warning(f"Error creating indexes on {collection.name}: {str(e)}")
     except Exception as e:
-        logger.error(f"Unexpected error creating index on {index_fields}: {str(e)}")
+        logger.error(f"Unexpected error creating indexes on {collection.name}: {str(e)}")
         raise
 
-def create_text_index(collection, field_name, **kwargs):
-    """Create a text index with special handling for language settings"""
+async def add_lowercase_names(collection, field_name):
+    """Backfill the lowercased copy of a name field (e.g. display_name_lc) where it is missing"""
     try:
-        # Check if text index already exists
-        existing_indexes = collection.index_information()
-        for name, info in existing_indexes.items():
-            if any('text' in str(key) for key in info['key']):
-                logger.info(f"Text index already exists on {collection.name}")
-                return
-
-        # Default settings for text index
-        default_settings = {
-            'default_language': 'english',
-            'language_override': 'no_language',
-            'background': True
-        }
-        # Update with any provided kwargs
-        settings = {**default_settings, **kwargs}
-        
         start_time = datetime.now()
-        collection.create_index(
-            [(field_name, "text")],
-            **settings
+        result = await collection.update_many(
+            {f"{field_name}_lc": {"$exists": False}, field_name: {"$type": "string"}},
+            [{"$set": {f"{field_name}_lc": {"$toLower": f"${field_name}"}}}]
         )
-        logger.info(f"Text index created on {field_name} "
+        logger.info(f"Added {field_name}_lc to {result.modified_count} documents in {collection.name} "
                    f"in {datetime.now() - start_time} seconds")
     except PyMongoError as e:
-        logger.warning(f"Error creating text index on {field_name}: {str(e)}")
-    except Exception as e:
-        logger.error(f"Unexpected error creating text index: {str(e)}")
-        raise
+        logger.warning(f"Error adding {field_name}_lc to {collection.name}: {str(e)}")
 
-def create_indexes(db):
+async def create_indexes(db):
     """Create all necessary indexes for all collections"""
     ENTITY_TYPES = [
         "works", "authors", "concepts",
@@ -360,46 +402,75 @@ def create_indexes(db):
     
     logger.info("Starting to create indexes for all collections...")
     
-    for entity_type in ENTITY_TYPES:
+    # Collections are indexed concurrently, but only a few index builds run on the server at once
+    semaphore = asyncio.Semaphore(INDEX_BUILD_CONCURRENCY)
+
+    async def create_collection_indexes(entity_type):
         collection = db[entity_type]
-        logger.info(f"Creating indexes for {entity_type}...")
-        
-        # Common indexes for all collections (note: removed unique constraint)
-        create_index(collection, [("id", ASCENDING)])
-        create_index(collection, [("display_name", ASCENDING)])  # Regular index for sorting and exact matches
-        create_index(collection, [("works_count", ASCENDING)])
-        create_index(collection, [("cited_by_count", ASCENDING)]) 
-
-        # Create text index for search functionality
-        if entity_type == "works":
-            create_text_index(collection, "search_blob")
-        else:
-            create_text_index(collection, "display_name")
-
-        # Collection-specific indexes
-        if entity_type == "works":
-            create_index(collection, [("ids.openalex", ASCENDING)])
-            create_index(collection, [("publication_year", ASCENDING)])
-            create_index(collection, [("authorships.author.id", ASCENDING)])
-            create_index(collection, [("_author_ids", ASCENDING)])
-            create_index(collection, [("concepts.id", ASCENDING)])
-            create_index(collection, [("ids.doi", ASCENDING)])
-            create_index(collection, [("_citation_key", ASCENDING)])
-            
-        elif entity_type == "authors":
-            create_index(collection, [("last_known_institution.id", ASCENDING)])
-            create_index(collection, [("x_concepts.id", ASCENDING)])
-            create_index(collection, [("ids.orcid", ASCENDING)])
-            
-        elif entity_type == "concepts":
-            create_index(collection, [("ancestors.id", ASCENDING)])
-        
+        async with semaphore:
+            logger.info(f"Creating indexes for {entity_type}...")
+            models = []
+
+            # Common indexes for all collections (note: removed unique constraint)
+            models.append(IndexModel([("id", ASCENDING)]))
+            models.append(IndexModel([("display_name", ASCENDING)]))  # Regular index for sorting and exact matches
+            models.append(IndexModel([("works_count", ASCENDING)]))
+            models.append(IndexModel([("cited_by_count", ASCENDING)]))
+
+            # Keyset pagination follows (sort key, _id), see filter_utils.build_keyset_query
+            models.append(IndexModel([("cited_by_count", DESCENDING), ("_id", ASCENDING)]))
+            if entity_type != "works":
+                models.append(IndexModel([("works_count", DESCENDING), ("_id", ASCENDING)]))
+
+            # Lowercased name for prefix filters (see filter_utils.build_name_filter); works
+            # are filtered by title only. The backfill scans the whole collection, so it only
+            # runs until the index exists (the import writes the field for new documents)
+            name_field = "title" if entity_type == "works" else "display_name"
+            existing_indexes = await collection.index_information()
+            if not any(info['key'][0][0] == f"{name_field}_lc" for info in existing_indexes.values()):
+                await add_lowercase_names(collection, name_field)
+            models.append(IndexModel([(f"{name_field}_lc", ASCENDING)]))
+
+            # Create text index for search functionality
+            if entity_type == "works":
+                models.append(IndexModel([("search_blob", "text")], **TEXT_INDEX_OPTIONS))
+            else:
+                models.append(IndexModel([("display_name", "text")], **TEXT_INDEX_OPTIONS))
+
+            # Collection-specific indexes
+            if entity_type == "works":
+                models.append(IndexModel([("ids.openalex", ASCENDING)]))
+                models.append(IndexModel([("publication_year", ASCENDING)]))
+                models.append(IndexModel([("authorships.author.id", ASCENDING)]))
+                models.append(IndexModel([("_author_ids", ASCENDING)]))
+                models.append(IndexModel([("_concept_ids", ASCENDING)]))
+                models.append(IndexModel([("title", ASCENDING)]))
+                models.append(IndexModel([("concepts.id", ASCENDING)]))
+                models.append(IndexModel([("ids.doi", ASCENDING)]))
+                models.append(IndexModel([("_citation_key", ASCENDING)]))
+                # group_by dimensions (see filter_utils.GROUP_BY_INDEXED_FIELDS)
+                models.append(IndexModel([("type", ASCENDING)]))
+                models.append(IndexModel([("language", ASCENDING)]))
+                models.append(IndexModel([("is_retracted", ASCENDING)]))
+                models.append(IndexModel([("has_fulltext", ASCENDING)]))
+
+            elif entity_type == "authors":
+                models.append(IndexModel([("last_known_institution.id", ASCENDING)]))
+                models.append(IndexModel([("x_concepts.id", ASCENDING)]))
+                models.append(IndexModel([("ids.orcid", ASCENDING)]))
+
+            elif entity_type == "concepts":
+                models.append(IndexModel([("ancestors.id", ASCENDING)]))
+
+            await create_missing_indexes(collection, models)
+
+    await asyncio.gather(*(create_collection_indexes(entity_type) for entity_type in ENTITY_TYPES))
     logger.info("All index creation jobs have been initiated")
 
 
 
 
-def check_index_progress(db, collection_name=None):
+async def check_index_progress(db, collection_name=None):
     """Check the progress of ongoing index creation operations and show completed indexes.
     
     Args:
@@ -410,7 +481,7 @@ def check_index_progress(db, collection_name=None):
         # Check ongoing index builds
         print("\nChecking ongoing and queued index builds...")
         admin_db = db.client.admin
-        current_ops = admin_db.command("currentOp", {"$all": True})
+        current_ops = await admin_db.command("currentOp", {"$all": True})
         found_index_ops = False
         seen_indexes = set()
         queued_indexes = {}  # Track queued indexes by collection
@@ -518,7 +589,7 @@ def check_index_progress(db, collection_name=None):
         print(f"Error checking index progress: {e}", file=sys.stderr)
         raise
 
-def list_indexes(db, collection_name=None):
+async def list_indexes(db, collection_name=None):
     """List all existing indexes for the specified collections.
     
     Args:
@@ -544,7 +615,7 @@ def list_indexes(db, collection_name=None):
             
             # Get existing indexes
             try:
-                index_info = collection.index_information()
+                index_info = await collection.index_information()
                 if index_info:
                     for name, info in sorted(index_info.items()):
                         key_str = ', '.join(f"{k}: {v}" for k, v in info['key'])
@@ -575,8 +646,8 @@ def parse_arguments():
     parser.add_argument("--limit", type=int, help="Limit the number of works to process")
     parser.add_argument("--skip-indexes", action="store_true",
                        help="Skip index creation")
-    parser.add_argument("--batch-size", type=int, default=1000,
-                       help="Number of documents to process in each batch (default: 1000, max recommended: 10000)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                       help=f"Number of documents to process in each batch (default: {DEFAULT_BATCH_SIZE}, max: {MAX_BATCH_SIZE})")
     parser.add_argument("--skip-updating", action="store_true",
                        help="Only create indexes without updating citation keys")
     parser.add_argument("--index-progress", action="store_true",
@@ -594,26 +665,26 @@ async def main():
     
     try:
         # Connect to MongoDB
-        client = MongoClient(args.mongo_uri)
+        client = AsyncMongoClient(args.mongo_uri)
         db = client.openalex
         logger.info("Connected to MongoDB")
         
         start_time = datetime.now()
     
         if args.list_indexes:
-            list_indexes(db, args.collection)
-            client.close()
+            await list_indexes(db, args.collection)
+            await client.close()
             sys.exit(0)
 
         if args.index_progress:
-            check_index_progress(db, args.collection)
-            client.close()
+            await check_index_progress(db, args.collection)
+            await client.close()
             sys.exit(0)
 
         # Handle index creation
         if not args.skip_indexes:
             logger.info("Creating indexes for all collections...")
-            create_indexes(db)
+            await create_indexes(db)
             duration = datetime.now() - start_time
             logger.info(f"Index creation completed in {duration}")
 
@@ -621,13 +692,16 @@ async def main():
         # Update works (including their indexes unless --skip-indexes)
         if not args.skip_updating:
             logger.info("update works with citation keys and indexes")
+            if args.batch_size > MAX_BATCH_SIZE:
+                logger.warning(f"Batch size {args.batch_size} exceeds the server's limit, using {MAX_BATCH_SIZE}")
+                args.batch_size = MAX_BATCH_SIZE
             logger.info(f"Using batch size: {args.batch_size}")
-            update_works_index(db, args.limit, batch_size=args.batch_size)
+            await update_works_index(db, args.limit, batch_size=args.batch_size)
         
 
         logger.info("update metadata for last index update")
         # Store update metadata
-        db.metadata.insert_one({
+        await db.metadata.insert_one({
             "key": "last_index_update",
             "value": datetime.now().isoformat(),
             "type": "works_citation_keys"
@@ -639,8 +713,7 @@ async def main():
         logger.error(f"Error updating index: {str(e)}")
         sys.exit(1)
     finally:
-        client.close()
+        await client.close()
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main())
\ No newline at end of file
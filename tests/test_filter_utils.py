@@ -0,0 +1,35 @@
+"""Tests for the filter helpers (run with: python -m unittest discover tests)"""
+
+import os
+import re
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "bin"))
+
+from filter_utils import build_name_filter
+
+
+class BuildNameFilterTest(unittest.TestCase):
+    def test_several_words_use_text_index_scoped_to_field(self):
+        query = build_name_filter("title", "Deep Learning")
+        self.assertEqual(query["$text"], {"$search": '"Deep" "Learning"'})
+        self.assertEqual(query["title_lc"], {"$all": [re.compile("deep"), re.compile("learning")]})
+
+    def test_contains_with_several_words_matches_substring(self):
+        query = build_name_filter("title", "deep learning", contains=True)
+        self.assertNotIn("$text", query)
+        self.assertEqual(query["title_lc"], re.compile(r"deep\ learning"))
+
+    def test_prefix_and_phrase_use_regex(self):
+        self.assertEqual(build_name_filter("title", "Deep lear*"), {"title_lc": re.compile(r"^deep\ lear")})
+        self.assertEqual(build_name_filter("display_name", '"Deep learning"'),
+                         {"display_name_lc": re.compile(r"^deep\ learning")})
+
+    def test_short_terms_are_rejected(self):
+        with self.assertRaises(ValueError):
+            build_name_filter("title", "ab*")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+"""Tests for the entity handlers (run with: python -m unittest discover tests)"""
+
+import os
+import sys
+import logging
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "bin"))
+
+try:
+    from fastapi import HTTPException
+    from handlers import BaseEntityHandler
+    from filter_utils import encode_cursor, decode_cursor
+except ImportError:  # fastapi, pymongo or elasticsearch not installed
+    BaseEntityHandler = None
+
+
+class FailingCollection:
+    """Collection stub that fails the test if MongoDB is queried"""
+    name = "works"
+
+    def find(self, *args, **kwargs):
+        raise AssertionError("MongoDB must not be queried for an empty search page")
+
+
+@unittest.skipIf(BaseEntityHandler is None, "handler dependencies not installed")
+class SearchEntitiesTest(unittest.IsolatedAsyncioTestCase):
+    def make_handler(self, found):
+        handler = BaseEntityHandler.__new__(BaseEntityHandler)
+        handler.collection = FailingCollection()
+        handler.entity_name = "work"
+        handler._list_projection = None
+        handler.useElasticSearch = True
+        handler.logger = logging.getLogger("handlers.test")
+
+        async def search_elasticsearch(query, skip, limit):
+            return found
+        handler.search_elasticsearch = search_elasticsearch
+        return handler
+
+    async def test_search_without_hits_returns_empty_page(self):
+        handler = self.make_handler({"total": 0, "results": []})
+        result = await handler.search_entities("no such title")
+        self.assertEqual(result["total"], 0)
+        self.assertEqual(result["results"], [])
+
+    async def test_search_past_last_page_returns_empty_page(self):
+        handler = self.make_handler({"total": 3, "results": []})
+        result = await handler.search_entities("programming", skip=20, limit=10)
+        self.assertEqual(result["results"], [])
+
+
+
+class FakeCursor:
+    """Find cursor stub recording skip and returning the documents after it"""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.skipped = 0
+
+    def sort(self, sort_list):
+        return self
+
+    def skip(self, skip):
+        self.skipped = skip
+        return self
+
+    def limit(self, limit):
+        self.limited = limit
+        return self
+
+    async def to_list(self, length):
+        return self.documents[self.skipped:self.skipped + length]
+
+
+class FakeCollection:
+    name = "works"
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.queries = []
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        return FakeCursor(self.documents)
+
+
+@unittest.skipIf(BaseEntityHandler is None, "handler dependencies not installed")
+class ListEntitiesTest(unittest.IsolatedAsyncioTestCase):
+    def make_handler(self, documents):
+        handler = BaseEntityHandler.__new__(BaseEntityHandler)
+        handler.collection = FakeCollection(documents)
+        handler.entity_name = "work"
+        handler._list_projection = None
+        handler.logger = logging.getLogger("handlers.test")
+        return handler
+
+    async def test_second_relevance_page(self):
+        documents = [{"_id": f"W{i}", "score": 1.0} for i in range(60)]
+        handler = self.make_handler(documents)
+        text_filter = {"$text": {"$search": '"john" "smith"'}}
+
+        first = await handler.list_entities(per_page=25, extra_filters=dict(text_filter))
+        self.assertEqual(decode_cursor(first["meta"]["next_cursor"]), [25])
+
+        second = await handler.list_entities(
+            per_page=25, extra_filters=dict(text_filter), cursor=first["meta"]["next_cursor"]
+        )
+        self.assertEqual([doc["_id"] for doc in second["results"]], [f"W{i}" for i in range(25, 50)])
+        self.assertEqual(decode_cursor(second["meta"]["next_cursor"]), [50])
+
+    async def test_invalid_relevance_offsets_are_rejected(self):
+        handler = self.make_handler([])
+        for values in ([-5], [True], ["25"], [25, 1]):
+            with self.assertRaises(HTTPException) as raised:
+                await handler.list_entities(
+                    extra_filters={"$text": {"$search": "smith"}}, cursor=encode_cursor(values)
+                )
+            self.assertEqual(raised.exception.status_code, 400)
+
+    async def test_non_scalar_keyset_values_are_rejected(self):
+        handler = self.make_handler([])
+        for values in ([{"$ne": None}, "W1"], [[1, 2], "W1"]):
+            with self.assertRaises(HTTPException) as raised:
+                await handler.list_entities(cursor=encode_cursor(values))
+            self.assertEqual(raised.exception.status_code, 400)
+        self.assertEqual(handler.collection.queries, [])
+
+
+if __name__ == "__main__":
+    unittest.main()